@@ -1,11 +1,77 @@
+import asyncio
+import aiohttp
 import requests
 import logging
+from collections import deque
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
 
+def _page_params(page, page_size, order=None):
+    """Query parameters for one API page, optionally sorted by createdAt"""
+    params = {"page": page, "limit": page_size}
+    if order:
+        params.update(sortBy="createdAt", order=order)
+    return params
+
+
 class TransactionAPIClient:
     BASE_URL = "https://685efce5c55df675589d49df.mockapi.io/api/v1"
+    PAGE_SIZE = 100
+    POOL_SIZE = 10
+    CONNECT_TIMEOUT = 3.05
+    READ_TIMEOUT = 30
+    MAX_RETRIES = 3
+    BACKOFF_FACTOR = 0.5
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        pool_size=None,
+        connect_timeout=None,
+        read_timeout=None,
+        max_retries=None,
+        backoff_factor=None,
+    ):
+        self.timeout = (
+            connect_timeout or self.CONNECT_TIMEOUT,
+            read_timeout or self.READ_TIMEOUT,
+        )
+        self.session = self._build_session(
+            pool_size or self.POOL_SIZE,
+            self.MAX_RETRIES if max_retries is None else max_retries,
+            self.BACKOFF_FACTOR if backoff_factor is None else backoff_factor,
+        )
+
+    def _build_session(self, pool_size, max_retries, backoff_factor):
+        """
+        Build a keep-alive session whose connection pool is shared by every
+        request this client makes, retrying idempotent GETs with
+        exponential backoff on throttling and server errors
+        """
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            # Hand the last response back so raise_for_status() reports it
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, max_retries=retry
+        )
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        """Release pooled connections"""
+        self.session.close()
 
     def fetch_transactions(self):
         """
@@ -13,7 +79,9 @@ class TransactionAPIClient:
         Returns list of transaction data or raises exception
         """
         try:
-            response = requests.get(f"{self.BASE_URL}/transactions")
+            response = self.session.get(
+                f"{self.BASE_URL}/transactions", timeout=self.timeout
+            )
             response.raise_for_status()
 
             transactions_data = response.json()
@@ -29,3 +97,175 @@ class TransactionAPIClient:
         except ValueError as e:
             logger.error(f"Invalid JSON response: {e}")
             raise
+
+    def iter_transactions(self, page_size=None, order=None):
+        """
+        Yield transactions from external API page by page, so only one
+        page is held in memory at a time. `order` ("asc" or "desc") sorts
+        them by createdAt
+        """
+        page_size = page_size or self.PAGE_SIZE
+        page = 1
+
+        while True:
+            transactions_data = self.fetch_transactions_page(
+                page, page_size, order
+            )
+            yield from transactions_data
+
+            # A short page is the last one
+            if len(transactions_data) < page_size:
+                return
+            page += 1
+
+    def fetch_transactions_page(self, page, page_size=None, order=None):
+        """
+        Fetch a single page of transactions from external API
+        Returns list of transaction data or raises exception
+        """
+        page_size = page_size or self.PAGE_SIZE
+
+        try:
+            response = self.session.get(
+                f"{self.BASE_URL}/transactions",
+                params=_page_params(page, page_size, order),
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+
+            transactions_data = response.json()
+            logger.info(
+                f"Fetched {len(transactions_data)} transactions from API "
+                f"page {page}"
+            )
+
+            return transactions_data
+
+        except requests.RequestException as e:
+            logger.error(f"Failed to fetch transactions page {page}: {e}")
+            raise
+        except ValueError as e:
+            logger.error(f"Invalid JSON response: {e}")
+            raise
+
+
+class AsyncTransactionAPIClient:
+    """
+    Fetches upstream pages concurrently with aiohttp, keeping up to
+    PREFETCH_PAGES pages buffered and at most CONCURRENCY requests in flight
+    """
+
+    BASE_URL = TransactionAPIClient.BASE_URL
+    PAGE_SIZE = TransactionAPIClient.PAGE_SIZE
+    CONCURRENCY = 5
+    PREFETCH_PAGES = 10
+    CONNECT_TIMEOUT = TransactionAPIClient.CONNECT_TIMEOUT
+    READ_TIMEOUT = TransactionAPIClient.READ_TIMEOUT
+    MAX_RETRIES = TransactionAPIClient.MAX_RETRIES
+    BACKOFF_FACTOR = TransactionAPIClient.BACKOFF_FACTOR
+    RETRY_STATUSES = TransactionAPIClient.RETRY_STATUSES
+
+    def __init__(self, page_size=None, concurrency=None, prefetch_pages=None):
+        self.page_size = page_size or self.PAGE_SIZE
+        self.concurrency = concurrency or self.CONCURRENCY
+        self.prefetch_pages = max(
+            prefetch_pages or self.PREFETCH_PAGES, self.concurrency
+        )
+
+    async def iter_pages(self, order=None):
+        """
+        Yield pages of transactions in page order until a short page,
+        fetching the following pages in the background meanwhile
+        """
+        semaphore = asyncio.BoundedSemaphore(self.concurrency)
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=self.CONNECT_TIMEOUT, sock_read=self.READ_TIMEOUT
+        )
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+
+        async with aiohttp.ClientSession(
+            timeout=timeout, connector=connector
+        ) as session:
+            pending = deque()
+            next_page = 1
+            try:
+                while True:
+                    while len(pending) < self.prefetch_pages:
+                        pending.append(
+                            asyncio.ensure_future(
+                                self.fetch_page(
+                                    session, semaphore, next_page, order
+                                )
+                            )
+                        )
+                        next_page += 1
+
+                    transactions_data = await pending.popleft()
+                    yield transactions_data
+
+                    # A short page is the last one
+                    if len(transactions_data) < self.page_size:
+                        return
+            finally:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def fetch_page(self, session, semaphore, page, order=None):
+        """
+        Fetch a single page of transactions, retrying throttling and
+        server errors with exponential backoff
+        Returns list of transaction data or raises exception
+        """
+        params = _page_params(page, self.page_size, order)
+        attempt = 0
+
+        while True:
+            try:
+                async with semaphore:
+                    async with session.get(
+                        f"{self.BASE_URL}/transactions", params=params
+                    ) as response:
+                        if (
+                            response.status not in self.RETRY_STATUSES
+                            or attempt == self.MAX_RETRIES
+                        ):
+                            response.raise_for_status()
+                            transactions_data = await response.json(
+                                content_type=None
+                            )
+                            logger.info(
+                                f"Fetched {len(transactions_data)} "
+                                f"transactions from API page {page}"
+                            )
+                            return transactions_data
+
+            except aiohttp.ClientError as e:
+                logger.error(f"Failed to fetch transactions page {page}: {e}")
+                raise
+            except ValueError as e:
+                logger.error(f"Invalid JSON response: {e}")
+                raise
+
+            await asyncio.sleep(self.BACKOFF_FACTOR * 2**attempt)
+            attempt += 1
+
+    def iter_transactions(self, order=None):
+        """
+        Yield transactions one by one from synchronous code, driving the
+        concurrent page fetcher on a private event loop
+        """
+        loop = asyncio.new_event_loop()
+        pages = self.iter_pages(order)
+        try:
+            while True:
+                try:
+                    transactions_data = loop.run_until_complete(
+                        pages.__anext__()
+                    )
+                except StopAsyncIteration:
+                    return
+                yield from transactions_data
+        finally:
+            loop.run_until_complete(pages.aclose())
+            loop.close()
@@ -0,0 +1,194 @@
+"""
+Opt-in per-request profiling.
+
+With REQUEST_PROFILING enabled, every response carries a Server-Timing
+header with the query count, database time, template render time and
+total time of the request, and requests over the configured thresholds or
+repeating the same SQL statement are logged.
+"""
+
+import logging
+import time
+from collections import Counter
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = 500
+MAX_QUERIES = 50
+DUPLICATE_QUERY_THRESHOLD = 5
+
+_current_profile = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """
+    Timings of one request. It is installed as a database execute wrapper,
+    so every query is counted and timed; statements are grouped on their
+    SQL with placeholders, so a query repeated with different parameters
+    shows up as a duplicate
+    """
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.statements = Counter()
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.query_count += 1
+            self.statements[sql] += 1
+
+    def get_duplicates(self, threshold):
+        """Return [(sql, count)] of statements run `threshold` times or more"""
+        return [
+            (sql, count)
+            for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+def _install_template_timer():
+    """
+    Time Django template renders into the current request's profile. Only
+    the outermost render is timed, so included templates and fragments
+    rendered from within a template are not counted twice
+    """
+    if getattr(Template.render, "profiled", False):
+        return
+    render = Template.render
+
+    def profiled_render(self, context=None, request=None):
+        profile = _current_profile.get()
+        if profile is None or profile._template_depth:
+            return render(self, context, request)
+
+        profile._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            profile.template_time += time.perf_counter() - started
+            profile._template_depth -= 1
+
+    profiled_render.profiled = True
+    Template.render = profiled_render
+
+
+class RequestProfilingMiddleware:
+    """
+    Report per-request query count and timings as Server-Timing metrics,
+    which browser developer tools show next to each request. Disabled
+    unless the REQUEST_PROFILING setting is true. Template time includes
+    queries run lazily from templates, and streamed responses are timed
+    up to the start of the stream. Async views are served without
+    switching threads, so they keep their concurrency under ASGI
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_PROFILING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.slow_request_ms = getattr(
+            settings, "REQUEST_PROFILING_SLOW_MS", SLOW_REQUEST_MS
+        )
+        self.max_queries = getattr(
+            settings, "REQUEST_PROFILING_MAX_QUERIES", MAX_QUERIES
+        )
+        self.duplicate_threshold = getattr(
+            settings,
+            "REQUEST_PROFILING_DUPLICATE_QUERIES",
+            DUPLICATE_QUERY_THRESHOLD,
+        )
+        _install_template_timer()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self._acall(request)
+
+        profile = RequestProfile()
+        started = time.perf_counter()
+        token = _current_profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                self._wrap_connections(stack, profile)
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self._finish(request, response, profile, started)
+
+    async def _acall(self, request):
+        profile = RequestProfile()
+        started = time.perf_counter()
+        token = _current_profile.set(profile)
+        stack = ExitStack()
+        try:
+            # Connections are per thread and the async ORM runs its
+            # queries in the request's sync thread, so wrap them there
+            await sync_to_async(self._wrap_connections)(stack, profile)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current_profile.reset(token)
+        return self._finish(request, response, profile, started)
+
+    def _wrap_connections(self, stack, profile):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+
+    def _finish(self, request, response, profile, started):
+        total_ms = (time.perf_counter() - started) * 1000
+
+        metrics = (
+            f"db;dur={profile.db_time * 1000:.1f};"
+            f'desc="{profile.query_count} queries", '
+            f"tpl;dur={profile.template_time * 1000:.1f}, "
+            f"total;dur={total_ms:.1f}"
+        )
+        if response.has_header("Server-Timing"):
+            metrics = f"{response['Server-Timing']}, {metrics}"
+        response["Server-Timing"] = metrics
+
+        self._log(request, profile, total_ms)
+        return response
+
+    def _log(self, request, profile, total_ms):
+        summary = (
+            f"{request.method} {request.path}: {total_ms:.1f} ms, "
+            f"{profile.query_count} queries in "
+            f"{profile.db_time * 1000:.1f} ms, templates in "
+            f"{profile.template_time * 1000:.1f} ms"
+        )
+        if (
+            total_ms > self.slow_request_ms
+            or profile.query_count > self.max_queries
+        ):
+            logger.warning(f"Slow request {summary}")
+
+        for sql, count in profile.get_duplicates(self.duplicate_threshold):
+            logger.warning(
+                f"Possible N+1 in {request.method} {request.path}: "
+                f"{count} identical queries: {sql}"
+            )
@@ -23,7 +23,7 @@ class TransactionAPIClientTest(TestCase):
             },
         ]
 
-    @patch("apps.core.api_client.requests.get")
+    @patch("apps.core.api_client.requests.Session.get")
     def test_fetch_transactions_success(self, mock_get):
         """Test successful API call"""
         # Mock successful response
@@ -47,9 +47,11 @@ class TransactionAPIClientTest(TestCase):
 
         # Verify the correct URL was called
         expected_url = f"{self.client.BASE_URL}/transactions"
-        mock_get.assert_called_once_with(expected_url)
+        mock_get.assert_called_once_with(
+            expected_url, timeout=self.client.timeout
+        )
 
-    @patch("apps.core.api_client.requests.get")
+    @patch("apps.core.api_client.requests.Session.get")
     def test_fetch_transactions_http_error(self, mock_get):
         """Test API call with HTTP error"""
         # Mock HTTP error response
@@ -63,7 +65,7 @@ class TransactionAPIClientTest(TestCase):
         with self.assertRaises(requests.RequestException):
             self.client.fetch_transactions()
 
-    @patch("apps.core.api_client.requests.get")
+    @patch("apps.core.api_client.requests.Session.get")
     def test_fetch_transactions_connection_error(self, mock_get):
         """Test API call with connection error"""
         # Mock connection error
@@ -75,7 +77,7 @@ class TransactionAPIClientTest(TestCase):
         with self.assertRaises(requests.RequestException):
             self.client.fetch_transactions()
 
-    @patch("apps.core.api_client.requests.get")
+    @patch("apps.core.api_client.requests.Session.get")
     def test_fetch_transactions_timeout(self, mock_get):
         """Test API call with timeout"""
         # Mock timeout error
@@ -87,7 +89,7 @@ class TransactionAPIClientTest(TestCase):
         with self.assertRaises(requests.RequestException):
             self.client.fetch_transactions()
 
-    @patch("apps.core.api_client.requests.get")
+    @patch("apps.core.api_client.requests.Session.get")
     def test_fetch_transactions_invalid_json(self, mock_get):
         """Test API call with invalid JSON response"""
         # Mock response with invalid JSON
@@ -101,7 +103,7 @@ class TransactionAPIClientTest(TestCase):
         with self.assertRaises(ValueError):
             self.client.fetch_transactions()
 
-    @patch("apps.core.api_client.requests.get")
+    @patch("apps.core.api_client.requests.Session.get")
     def test_fetch_transactions_empty_response(self, mock_get):
         """Test API call with empty response"""
         # Mock empty response
@@ -118,7 +120,7 @@ class TransactionAPIClientTest(TestCase):
         self.assertEqual(result, [])
         self.assertEqual(len(result), 0)
 
-    @patch("apps.core.api_client.requests.get")
+    @patch("apps.core.api_client.requests.Session.get")
     def test_fetch_transactions_server_error(self, mock_get):
         """Test API call with 500 server error"""
         # Mock server error
@@ -134,7 +136,7 @@ class TransactionAPIClientTest(TestCase):
             self.client.fetch_transactions()
 
     @patch("apps.core.api_client.logger")
-    @patch("apps.core.api_client.requests.get")
+    @patch("apps.core.api_client.requests.Session.get")
     def test_fetch_transactions_logging(self, mock_get, mock_logger):
         """Test that successful calls are logged"""
         # Mock successful response
@@ -151,7 +153,7 @@ class TransactionAPIClientTest(TestCase):
         mock_logger.info.assert_called_with("Fetched 2 transactions from API")
 
     @patch("apps.core.api_client.logger")
-    @patch("apps.core.api_client.requests.get")
+    @patch("apps.core.api_client.requests.Session.get")
     def test_fetch_transactions_error_logging(self, mock_get, mock_logger):
         """Test that errors are logged"""
         # Mock connection error
@@ -175,7 +177,7 @@ class TransactionAPIClientTest(TestCase):
         expected_url = "https://685efce5c55df675589d49df.mockapi.io/api/v1"
         self.assertEqual(self.client.BASE_URL, expected_url)
 
-    @patch("apps.core.api_client.requests.get")
+    @patch("apps.core.api_client.requests.Session.get")
     def test_fetch_transactions_malformed_data(self, mock_get):
         """Test API call with malformed transaction data"""
         # Mock response with malformed data
@@ -198,3 +200,91 @@ class TransactionAPIClientTest(TestCase):
         result = self.client.fetch_transactions()
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]["amount"], "not_a_number")
+
+    @patch("apps.core.api_client.requests.Session.get")
+    def test_iter_transactions_pages(self, mock_get):
+        """Test records are streamed page by page until a short page"""
+        pages = [
+            [{"id": "1"}, {"id": "2"}],
+            [{"id": "3"}, {"id": "4"}],
+            [{"id": "5"}],
+        ]
+        responses = []
+        for page in pages:
+            mock_response = Mock()
+            mock_response.json.return_value = page
+            mock_response.raise_for_status.return_value = None
+            responses.append(mock_response)
+        mock_get.side_effect = responses
+
+        iterator = self.client.iter_transactions(page_size=2)
+
+        # Nothing is fetched until the generator is consumed
+        mock_get.assert_not_called()
+        ids = [record["id"] for record in iterator]
+
+        self.assertEqual(ids, ["1", "2", "3", "4", "5"])
+        self.assertEqual(mock_get.call_count, 3)
+        mock_get.assert_called_with(
+            f"{self.client.BASE_URL}/transactions",
+            params={"page": 3, "limit": 2},
+            timeout=self.client.timeout,
+        )
+
+    @patch("apps.core.api_client.requests.Session.get")
+    def test_iter_transactions_empty_last_page(self, mock_get):
+        """Test an empty page ends the stream"""
+        full_page = Mock()
+        full_page.json.return_value = [{"id": "1"}, {"id": "2"}]
+        empty_page = Mock()
+        empty_page.json.return_value = []
+        mock_get.side_effect = [full_page, empty_page]
+
+        result = list(self.client.iter_transactions(page_size=2))
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("apps.core.api_client.requests.Session.get")
+    def test_iter_transactions_http_error(self, mock_get):
+        """Test a failing page propagates the error"""
+        mock_response = Mock()
+        mock_response.raise_for_status.side_effect = (
+            requests.exceptions.HTTPError("500 Server Error")
+        )
+        mock_get.return_value = mock_response
+
+        with self.assertRaises(requests.RequestException):
+            list(self.client.iter_transactions())
+
+    def test_session_pool_and_retry_configuration(self):
+        """Test the session pools connections and retries GETs"""
+        client = TransactionAPIClient(
+            pool_size=4, connect_timeout=1, read_timeout=5, max_retries=2
+        )
+        adapter = client.session.get_adapter(client.BASE_URL)
+
+        self.assertEqual(client.timeout, (1, 5))
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertEqual(
+            adapter.max_retries.backoff_factor, client.BACKOFF_FACTOR
+        )
+        for status in (429, 500, 502, 503, 504):
+            self.assertIn(status, adapter.max_retries.status_forcelist)
+        self.assertIn("GET", adapter.max_retries.allowed_methods)
+
+    @patch("apps.core.api_client.requests.Session.get")
+    def test_iter_transactions_reuses_session(self, mock_get):
+        """Test every page goes through the client's pooled session"""
+        full_page = Mock()
+        full_page.json.return_value = [{"id": "1"}]
+        empty_page = Mock()
+        empty_page.json.return_value = []
+        mock_get.side_effect = [full_page, empty_page]
+
+        session = self.client.session
+        list(self.client.iter_transactions(page_size=1))
+
+        self.assertIs(self.client.session, session)
+        self.assertEqual(mock_get.call_count, 2)
@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from django.test import SimpleTestCase, TestCase
+from unittest.mock import patch
+import aiohttp
+from apps.core.api_client import AsyncTransactionAPIClient
+from apps.transactions.models import Transaction
+from apps.transactions.services import TransactionService
+
+
+class StubTransactionAPI:
+    """Local HTTP server serving `records` with mockapi page/limit paging"""
+
+    def __init__(self, records, delay=0.05, failures=None):
+        self.records = records
+        self.delay = delay
+        # Page number -> status codes returned before the page succeeds
+        self.failures = failures or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requested_pages = []
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                page = int(query["page"][0])
+                limit = int(query["limit"][0])
+
+                with stub.lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(
+                        stub.max_in_flight, stub.in_flight
+                    )
+                    stub.requested_pages.append(page)
+                    statuses = stub.failures.get(page, [])
+                    status = statuses.pop(0) if statuses else 200
+                time.sleep(stub.delay)
+
+                body = b"{}"
+                if status == 200:
+                    offset = (page - 1) * limit
+                    page_records = stub.records[offset:][:limit]
+                    body = json.dumps(page_records).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+                with stub.lock:
+                    stub.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _records(count):
+    return [
+        {
+            "id": str(i),
+            "amount": 10,
+            "type": "deposit",
+            "createdAt": f"2025-07-{i % 28 + 1:02d}T10:00:00Z",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+class AsyncTransactionAPIClientTest(SimpleTestCase):
+
+    def test_iter_transactions_fetches_pages_concurrently(self):
+        """Test pages are fetched in parallel but yielded in order"""
+        with StubTransactionAPI(_records(45)) as stub:
+            with patch.object(
+                AsyncTransactionAPIClient, "BASE_URL", stub.base_url
+            ):
+                client = AsyncTransactionAPIClient(page_size=5, concurrency=3)
+                ids = [record["id"] for record in client.iter_transactions()]
+
+        self.assertEqual(ids, [str(i) for i in range(1, 46)])
+        self.assertGreater(stub.max_in_flight, 1)
+        self.assertLessEqual(stub.max_in_flight, 3)
+
+    def test_fetch_page_retries_server_errors(self):
+        """Test 5xx responses are retried before the page succeeds"""
+        stub_api = StubTransactionAPI(
+            _records(3), delay=0, failures={1: [503, 500]}
+        )
+        with stub_api as stub:
+            with (
+                patch.object(
+                    AsyncTransactionAPIClient, "BASE_URL", stub.base_url
+                ),
+                patch.object(AsyncTransactionAPIClient, "BACKOFF_FACTOR", 0),
+            ):
+                client = AsyncTransactionAPIClient(page_size=5)
+                result = list(client.iter_transactions())
+
+        self.assertEqual(len(result), 3)
+        self.assertEqual(stub.requested_pages.count(1), 3)
+
+    def test_fetch_page_gives_up_after_retries(self):
+        """Test a persistently failing page raises"""
+        stub_api = StubTransactionAPI(
+            _records(3), delay=0, failures={1: [503] * 10}
+        )
+        with stub_api as stub:
+            with (
+                patch.object(
+                    AsyncTransactionAPIClient, "BASE_URL", stub.base_url
+                ),
+                patch.object(AsyncTransactionAPIClient, "BACKOFF_FACTOR", 0),
+            ):
+                client = AsyncTransactionAPIClient(page_size=5)
+                with self.assertRaises(aiohttp.ClientResponseError):
+                    list(client.iter_transactions())
+
+
+class ConcurrentImportTest(TestCase):
+
+    def test_import_transactions_concurrently(self):
+        """Test concurrently fetched pages feed the bulk import path"""
+        with StubTransactionAPI(_records(120), delay=0.01) as stub:
+            with (
+                patch.object(
+                    AsyncTransactionAPIClient, "BASE_URL", stub.base_url
+                ),
+                patch.object(AsyncTransactionAPIClient, "PAGE_SIZE", 25),
+            ):
+                created_count, skipped_count = (
+                    TransactionService.import_transactions_from_api(
+                        concurrent=True
+                    )
+                )
+
+        self.assertEqual(created_count, 120)
+        self.assertEqual(skipped_count, 0)
+        self.assertEqual(Transaction.objects.count(), 120)
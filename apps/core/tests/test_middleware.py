@@ -0,0 +1,73 @@
+import re
+from datetime import timedelta
+from decimal import Decimal
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from apps.core.middleware import RequestProfilingMiddleware
+from apps.transactions.models import Transaction
+
+SERVER_TIMING = re.compile(
+    r'^db;dur=[\d.]+;desc="(\d+) queries", '
+    r"tpl;dur=[\d.]+, total;dur=[\d.]+$"
+)
+
+
+@override_settings(REQUEST_PROFILING=True)
+class RequestProfilingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        for i in range(3):
+            Transaction.objects.create(
+                transaction_code=f"TXN-{i + 1:04d}",
+                amount=Decimal("10.00"),
+                type="deposit",
+                transaction_date=now - timedelta(days=3 - i),
+            )
+
+    def test_server_timing_header(self):
+        """Test responses report the query count and timings"""
+        response = self.client.get("/")
+
+        match = SERVER_TIMING.match(response["Server-Timing"])
+        self.assertIsNotNone(match, response["Server-Timing"])
+        self.assertGreater(int(match.group(1)), 0)
+
+    async def test_server_timing_header_async(self):
+        """Test queries of async views are counted under ASGI"""
+        response = await self.async_client.get("/")
+
+        match = SERVER_TIMING.match(response["Server-Timing"])
+        self.assertGreater(int(match.group(1)), 0)
+
+    @override_settings(REQUEST_PROFILING=False)
+    def test_disabled_by_default(self):
+        """Test the middleware is skipped unless enabled"""
+        response = self.client.get("/")
+
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    @override_settings(REQUEST_PROFILING_MAX_QUERIES=0)
+    def test_logs_requests_over_threshold(self):
+        """Test requests over the query threshold are logged"""
+        with self.assertLogs("apps.core.middleware", "WARNING") as logs:
+            self.client.get("/balance/")
+
+        self.assertIn("Slow request GET /balance/", logs.output[0])
+
+    @override_settings(REQUEST_PROFILING_DUPLICATE_QUERIES=3)
+    def test_logs_repeated_queries(self):
+        """Test a statement repeated with different parameters is logged"""
+
+        def view(request):
+            for pk in Transaction.objects.values_list("pk", flat=True):
+                Transaction.objects.filter(pk=pk).exists()
+            return HttpResponse()
+
+        middleware = RequestProfilingMiddleware(view)
+        with self.assertLogs("apps.core.middleware", "WARNING") as logs:
+            middleware(RequestFactory().get("/"))
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Possible N+1 in GET /: 3 identical", logs.output[0])
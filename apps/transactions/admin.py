@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Transaction
+from .models import BalanceSnapshot, ImportJob, Transaction
 
 
 @admin.register(Transaction)
@@ -8,6 +8,7 @@ class TransactionAdmin(admin.ModelAdmin):
         "transaction_code",
         "type",
         "amount",
+        "running_balance",
         "transaction_date",
         "created_at",
     ]
@@ -15,3 +16,32 @@ class TransactionAdmin(admin.ModelAdmin):
     search_fields = ["transaction_code"]
     readonly_fields = ["created_at", "updated_at"]
     ordering = ["-transaction_date"]
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "status",
+        "created_count",
+        "skipped_count",
+        "started_at",
+        "finished_at",
+    ]
+    list_filter = ["status"]
+    readonly_fields = ["created_at", "updated_at"]
+
+
+@admin.register(BalanceSnapshot)
+class BalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = [
+        "period",
+        "start",
+        "opening_balance",
+        "deposits",
+        "expenses",
+        "closing_balance",
+        "count",
+    ]
+    list_filter = ["period"]
+    ordering = ["period", "-start"]
@@ -0,0 +1,321 @@
+"""
+JSON API and exports of the ledger for other services. List responses
+and exports are streamed row by row, so large ranges are never held in
+memory.
+"""
+
+import json
+from functools import wraps
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction as db_transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import (
+    require_GET,
+    require_http_methods,
+    require_POST,
+)
+from .cursors import decode_cursor, encode_cursor
+from .export import EXPORT_FORMATS, iter_ledger
+from .forms import TransactionForm, TransactionRecordForm
+from .models import (
+    DAILY_EXPENSE_LIMIT,
+    DailyExpenseLimitReached,
+    Transaction,
+)
+from .services import TransactionService
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 10_000
+API_MAX_BULK_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+
+
+def serialize_transaction(transaction):
+    """JSON-ready dict of a transaction, amounts as decimal strings"""
+    return {
+        "id": transaction.pk,
+        "transaction_code": transaction.transaction_code,
+        "type": transaction.type,
+        "amount": f"{transaction.amount:.2f}",
+        "transaction_date": transaction.transaction_date.isoformat(),
+        "running_balance": f"{transaction.running_balance:.2f}",
+    }
+
+
+def _error_response(message, status=400):
+    return JsonResponse({"error": message}, status=status)
+
+
+def _require_json_body(view):
+    """
+    Refuse POSTs whose body is not declared as application/json with 415.
+    The write endpoints are csrf_exempt for other services, and browsers
+    only send that content type cross-site after a CORS preflight, which
+    this API never grants, so other web pages cannot post to it
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method == "POST"
+            and request.content_type != "application/json"
+        ):
+            return _error_response(
+                "Content-Type must be application/json", status=415
+            )
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def _parse_json_body(request):
+    """Decoded JSON request body, raises ValueError if malformed"""
+    try:
+        return json.loads(request.body)
+    except ValueError:
+        raise ValueError("Request body must be valid JSON")
+
+
+def _parse_datetime_param(params, name):
+    """Optional ISO 8601 query parameter, raises ValueError if malformed"""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"`{name}` must be an ISO 8601 datetime")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _filter_transactions(params):
+    """
+    Newest-first transactions selected by the list query parameters.
+    Returns tuple: (transactions, limit), raises ValueError on invalid
+    parameters
+    """
+    transactions = Transaction.objects.newest_first()
+
+    transaction_type = params.get("type")
+    if transaction_type:
+        if transaction_type not in ("deposit", "expense"):
+            raise ValueError("`type` must be deposit or expense")
+        transactions = transactions.filter(type=transaction_type)
+
+    transactions = transactions.between(
+        _parse_datetime_param(params, "start"),
+        _parse_datetime_param(params, "end"),
+    )
+
+    cursor = params.get("cursor")
+    if cursor:
+        try:
+            transactions = transactions.before(*decode_cursor(cursor))
+        except ValueError:
+            raise ValueError("Invalid cursor")
+
+    try:
+        limit = int(params.get("limit", API_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= API_MAX_PAGE_SIZE:
+        raise ValueError(f"`limit` must be between 1 and {API_MAX_PAGE_SIZE}")
+
+    return transactions, limit
+
+
+async def _aiter_in_thread(parts):
+    """
+    Async iterator over the sync iterator `parts`, advanced in batches in
+    the request's sync thread, where its database cursor lives
+    """
+    next_batch = sync_to_async(
+        lambda: "".join(islice(parts, STREAM_CHUNK_SIZE))
+    )
+    try:
+        while batch := await next_batch():
+            yield batch
+    finally:
+        await sync_to_async(parts.close)()
+
+
+def _streaming_response(request, parts, **kwargs):
+    """
+    Stream the generator `parts`. Under ASGI it is handed over as an async
+    iterator, as Django reads a sync one to the end before sending any of
+    it, while under WSGI an async one would be read to the end instead
+    """
+    if isinstance(request, ASGIRequest):
+        parts = _aiter_in_thread(parts)
+    return StreamingHttpResponse(parts, **kwargs)
+
+
+def _stream_page(transactions, limit):
+    """
+    Yield a JSON page of up to `limit` rows piece by piece, reading them
+    in chunks through a server-side cursor where the database has one.
+    One extra row is read to know whether a next page exists
+    """
+    yield '{"results": ['
+    last = None
+    next_cursor = None
+    rows = transactions[: limit + 1].iterator(chunk_size=STREAM_CHUNK_SIZE)
+    for index, transaction in enumerate(rows):
+        if index == limit:
+            next_cursor = encode_cursor(last)
+            break
+        separator = "," if index else ""
+        yield separator + json.dumps(serialize_transaction(transaction))
+        last = transaction
+    yield f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@_require_json_body
+def transactions(request):
+    """
+    GET lists transactions newest first, filtered by `type`, `start`
+    and `end`, in pages of `limit` continued with `cursor`.
+    POST creates one transaction with the same checks as the web form
+    """
+    if request.method == "POST":
+        return _create_transaction(request)
+
+    try:
+        transactions, limit = _filter_transactions(request.GET)
+    except ValueError as e:
+        return _error_response(str(e))
+
+    return _streaming_response(
+        request,
+        _stream_page(transactions, limit),
+        content_type="application/json",
+    )
+
+
+def _create_transaction(request):
+    try:
+        data = _parse_json_body(request)
+    except ValueError as e:
+        return _error_response(str(e))
+    if not isinstance(data, dict):
+        return _error_response("Expected a JSON object")
+
+    form = TransactionForm(data)
+    if not form.is_valid():
+        return JsonResponse(
+            {"errors": form.errors.get_json_data()}, status=400
+        )
+
+    transaction = form.save(commit=False)
+    transaction.transaction_code = Transaction.allocate_codes()[0]
+    transaction.transaction_date = timezone.now()
+    try:
+        transaction.save(expense_limit=DAILY_EXPENSE_LIMIT)
+    except DailyExpenseLimitReached as e:
+        return _error_response(str(e))
+
+    return JsonResponse(serialize_transaction(transaction), status=201)
+
+
+@require_GET
+def transaction_detail(request, pk):
+    try:
+        transaction = Transaction.objects.get(pk=pk)
+    except Transaction.DoesNotExist:
+        return _error_response("Transaction not found", status=404)
+
+    return JsonResponse(serialize_transaction(transaction))
+
+
+@csrf_exempt
+@require_POST
+@_require_json_body
+def bulk_create_transactions(request):
+    """
+    Create up to API_MAX_BULK_SIZE transactions from a JSON list through
+    the bulk importer: one block of codes, batched INSERTs and a single
+    balance rebuild. Like imports, the records skip the balance and daily
+    limit checks. Nothing is created if any record is invalid
+    """
+    try:
+        records = _parse_json_body(request)
+    except ValueError as e:
+        return _error_response(str(e))
+    if not isinstance(records, list) or not records:
+        return _error_response("Expected a non-empty JSON list")
+    if len(records) > API_MAX_BULK_SIZE:
+        return _error_response(
+            f"At most {API_MAX_BULK_SIZE} transactions per request"
+        )
+
+    forms = [
+        TransactionRecordForm(record if isinstance(record, dict) else {})
+        for record in records
+    ]
+    errors = {
+        index: form.errors.get_json_data()
+        for index, form in enumerate(forms)
+        if not form.is_valid()
+    }
+    if errors:
+        return JsonResponse({"errors": errors}, status=400)
+
+    now = timezone.now()
+    codes = Transaction.allocate_codes(len(forms))
+    with db_transaction.atomic():
+        TransactionService.import_transactions(
+            {
+                "id": code,
+                "amount": form.cleaned_data["amount"],
+                "type": form.cleaned_data["type"],
+                "createdAt": (
+                    form.cleaned_data["transaction_date"] or now
+                ).isoformat(),
+            }
+            for code, form in zip(codes, forms)
+        )
+        created = [
+            serialize_transaction(transaction)
+            for transaction in Transaction.objects.filter(
+                transaction_code__in=codes
+            ).chronological()
+        ]
+
+    return JsonResponse({"results": created}, status=201)
+
+
+@require_GET
+def export_transactions(request, export_format):
+    """
+    Download the ledger dated between the optional `start` and `end` as
+    CSV or NDJSON, oldest first with running balances, streamed
+    """
+    if export_format not in EXPORT_FORMATS:
+        return _error_response("Unknown export format", status=404)
+    try:
+        start = _parse_datetime_param(request.GET, "start")
+        end = _parse_datetime_param(request.GET, "end")
+    except ValueError as e:
+        return _error_response(str(e))
+
+    generate_lines, content_type = EXPORT_FORMATS[export_format]
+    response = _streaming_response(
+        request,
+        generate_lines(iter_ledger(start, end)),
+        content_type=content_type,
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="transactions.{export_format}"'
+    )
+    return response
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class TransactionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.transactions"
+
+    def ready(self):
+        post_migrate.connect(create_code_sequences, sender=self)
+
+
+def create_code_sequences(sender, using, **kwargs):
+    """Create database sequences, which no model owns, after migrate"""
+    from .models import TRANSACTION_CODE_SEQUENCE, CodeSequence
+
+    CodeSequence.objects.db_manager(using).create_sequence(
+        TRANSACTION_CODE_SEQUENCE
+    )
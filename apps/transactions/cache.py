@@ -0,0 +1,192 @@
+"""
+Ledger caching on top of Django's cache framework.
+
+Cached values are keyed on a ledger version that is bumped whenever
+transactions change, so stale entries are never read again and simply
+expire from the backend.
+"""
+
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction as db_transaction
+
+VERSION_KEY = "transactions:ledger-version"
+BALANCE_KEY = "transactions:balance:{version}"
+FRAGMENT_KEY = "transactions:fragment:{version}:{name}"
+STATS_KEY = "transactions:balance-stats:{name}"
+IMPORT_PROGRESS_KEY = "transactions:import-progress:{job_id}"
+BALANCE_TIMEOUT = 60 * 60
+FRAGMENT_TIMEOUT = 60 * 60
+IMPORT_PROGRESS_TIMEOUT = 24 * 60 * 60
+
+
+def get_cache():
+    """Cache backend configured by TRANSACTIONS_CACHE_ALIAS"""
+    return caches[getattr(settings, "TRANSACTIONS_CACHE_ALIAS", "default")]
+
+
+def is_process_local():
+    """
+    Whether the cache lives in this process only. Ledger versions are
+    bumped in the cache, so processes writing the ledger apart from the
+    web server (the import worker) need a backend they all share
+    """
+    return isinstance(get_cache(), LocMemCache)
+
+
+def get_ledger_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock rather than 1 so an evicted counter never
+        # resurrects entries cached under an earlier version
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_ledger_version():
+    cache = get_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_ledger_version():
+    cache = get_cache()
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        get_ledger_version()
+        return cache.incr(VERSION_KEY)
+
+
+def invalidate_ledger(refresh=None):
+    """
+    Mark cached ledger data as stale.
+
+    The version is bumped immediately, so later reads on this connection
+    see fresh data, and again on commit, so anything other connections
+    cached from pre-commit state is dropped. `refresh`, if given, is called
+    after commit to write the new balance through to the cache.
+    """
+    bump_ledger_version()
+
+    def on_commit():
+        version = bump_ledger_version()
+        if refresh is not None:
+            get_cache().set(
+                BALANCE_KEY.format(version=version),
+                refresh(),
+                BALANCE_TIMEOUT,
+            )
+
+    db_transaction.on_commit(on_commit)
+
+
+def get_balance(compute):
+    """
+    Return the cached balance for the current ledger version, falling
+    back to `compute()` and caching its result on a miss
+    """
+    cache = get_cache()
+    key = BALANCE_KEY.format(version=get_ledger_version())
+    balance = cache.get(key)
+    if balance is None:
+        _count("misses")
+        balance = compute()
+        cache.set(key, balance, BALANCE_TIMEOUT)
+    else:
+        _count("hits")
+    return balance
+
+
+async def aget_balance(compute):
+    """Async get_balance(), `compute` being a coroutine function"""
+    cache = get_cache()
+    key = BALANCE_KEY.format(version=await aget_ledger_version())
+    balance = await cache.aget(key)
+    if balance is None:
+        await _acount("misses")
+        balance = await compute()
+        await cache.aset(key, balance, BALANCE_TIMEOUT)
+    else:
+        await _acount("hits")
+    return balance
+
+
+def get_fragment(name, render):
+    """
+    Return the rendered fragment `name` for the current ledger version,
+    falling back to `render()` and caching its result on a miss
+    """
+    cache = get_cache()
+    key = FRAGMENT_KEY.format(version=get_ledger_version(), name=name)
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = render()
+        cache.set(key, fragment, FRAGMENT_TIMEOUT)
+    return fragment
+
+
+async def aget_fragment(name, render):
+    """Async get_fragment(), `render` being a coroutine function"""
+    cache = get_cache()
+    key = FRAGMENT_KEY.format(version=await aget_ledger_version(), name=name)
+    fragment = await cache.aget(key)
+    if fragment is None:
+        fragment = await render()
+        await cache.aset(key, fragment, FRAGMENT_TIMEOUT)
+    return fragment
+
+
+def get_balance_stats():
+    """Return balance cache hit/miss counters"""
+    cache = get_cache()
+    return {
+        name: cache.get(STATS_KEY.format(name=name), 0)
+        for name in ("hits", "misses")
+    }
+
+
+def set_import_progress(job_id, created_count, skipped_count):
+    """
+    Publish running import counts. They go through the cache rather than
+    the job row because the import's own database transaction is still
+    open, so the worker and web processes need a shared cache backend to
+    see them
+    """
+    get_cache().set(
+        IMPORT_PROGRESS_KEY.format(job_id=job_id),
+        (created_count, skipped_count),
+        IMPORT_PROGRESS_TIMEOUT,
+    )
+
+
+def get_import_progress(job_id):
+    """Return (created_count, skipped_count) of a running import, or None"""
+    return get_cache().get(IMPORT_PROGRESS_KEY.format(job_id=job_id))
+
+
+def _count(name):
+    cache = get_cache()
+    key = STATS_KEY.format(name=name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First count or evicted counter. A parallel first count may win
+        # the add(), losing one count is fine
+        cache.add(key, 1, timeout=None)
+
+
+async def _acount(name):
+    cache = get_cache()
+    key = STATS_KEY.format(name=name)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 1, timeout=None)
@@ -0,0 +1,40 @@
+"""
+Opaque cursors for keyset pagination over the ledger. A cursor encodes
+the (transaction_date, pk) position of a row, so the next page can start
+right after it with an index range scan instead of an OFFSET.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MAX_PK = 2**63 - 1
+
+
+def encode_cursor(transaction):
+    """Encode a row's (transaction_date, pk) ledger position for URLs"""
+    return _encode(transaction.transaction_date, transaction.pk)
+
+
+def _encode(transaction_date, pk):
+    micros = (transaction_date - CURSOR_EPOCH) // timedelta(microseconds=1)
+    return f"{micros}_{pk}"
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor, raises ValueError on malformed input"""
+    micros, pk = cursor.split("_")
+    pk = int(pk)
+    if not 0 < pk <= MAX_PK:
+        raise ValueError("Cursor id out of range")
+    try:
+        return CURSOR_EPOCH + timedelta(microseconds=int(micros)), pk
+    except OverflowError as e:
+        raise ValueError("Cursor date out of range") from e
+
+
+def normalize_cursor(cursor):
+    """
+    Canonical spelling of `cursor`, e.g. " 01_5" -> "1_5", so equivalent
+    cursors share cache keys. Raises ValueError on malformed input
+    """
+    return _encode(*decode_cursor(cursor))
@@ -0,0 +1,77 @@
+"""
+Streaming ledger export. Rows are read chronologically through a
+server-side cursor and the running balance is accumulated while they
+stream, so memory use does not depend on the size of the ledger.
+"""
+
+import csv
+import json
+from .models import Transaction, format_cents, to_cents
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_COLUMNS = [
+    "transaction_code",
+    "transaction_date",
+    "type",
+    "amount",
+    "running_balance",
+]
+
+
+def iter_ledger(start=None, end=None):
+    """
+    Yield ledger rows dated within [start, end] oldest first, as dicts
+    of EXPORT_COLUMNS with amounts as decimal strings
+    """
+    rows = Transaction.objects.chronological().between(start, end)
+    # Accumulated in integer cents
+    balance = 0
+    if start is not None:
+        opening = (
+            Transaction.objects.filter(transaction_date__lt=start)
+            .newest_first()
+            .values_list("running_balance", flat=True)
+            .first()
+        )
+        balance = to_cents(opening) if opening is not None else 0
+
+    rows = rows.values_list(
+        "transaction_code", "transaction_date", "type", "signed_cents"
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for code, transaction_date, transaction_type, cents in rows:
+        balance += cents
+        yield {
+            "transaction_code": code,
+            "transaction_date": transaction_date.isoformat(),
+            "type": transaction_type,
+            "amount": format_cents(abs(cents)),
+            "running_balance": format_cents(balance),
+        }
+
+
+class _Echo:
+    """File-like object whose write() hands back what it is given"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    """Yield CSV lines, header first, for dicts of EXPORT_COLUMNS"""
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_COLUMNS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(rows):
+    """Yield one JSON document per line"""
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+# Format name: (line generator, content type)
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+}
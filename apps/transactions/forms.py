@@ -1,6 +1,6 @@
 from django import forms
-from .models import Transaction
-from datetime import date
+from django.utils import timezone
+from .models import DAILY_EXPENSE_LIMIT, DailyExpenseCount, Transaction
 
 
 class TransactionForm(forms.ModelForm):
@@ -36,12 +36,11 @@ class TransactionForm(forms.ModelForm):
                 raise forms.ValidationError("Not enough balance")
                 # Check daily expense limit (200 expenses per day)
             if transaction_type == "expense":
-                today = date.today()
-                today_expenses_count = Transaction.objects.filter(
-                    type="expense", transaction_date__date=today
-                ).count()
+                today_expenses_count = DailyExpenseCount.objects.get_count(
+                    timezone.localdate()
+                )
 
-                if today_expenses_count >= 200:
+                if today_expenses_count >= DAILY_EXPENSE_LIMIT:
                     raise (
                         forms.ValidationError(
                             "Your daily expense limit reached."
@@ -49,3 +48,22 @@ class TransactionForm(forms.ModelForm):
                     )
 
         return cleaned_data
+
+
+class TransactionRecordForm(forms.Form):
+    """
+    One record of an API bulk create. Like imported records, these skip
+    the balance and daily limit checks of TransactionForm
+    """
+
+    type = forms.ChoiceField(
+        choices=[("deposit", "Deposit"), ("expense", "Expense")]
+    )
+    amount = forms.DecimalField(max_digits=10, decimal_places=2)
+    transaction_date = forms.DateTimeField(required=False)
+
+    def clean_amount(self):
+        amount = self.cleaned_data["amount"]
+        if amount <= 0:
+            raise forms.ValidationError("Amount must be positive")
+        return amount
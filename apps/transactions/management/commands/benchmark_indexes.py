@@ -0,0 +1,127 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from apps.transactions.models import Transaction
+from apps.transactions.seeding import seed_transactions
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare query plans and latency of the Transaction hot queries "
+        "with and without the composite indexes, on a throwaway seeded "
+        "test database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=100_000,
+            help="Number of transactions to seed",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Timed runs per query, the median is reported",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        # Never touch the real database: seed a test database instead
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=False
+        )
+        try:
+            self._seed(options["rows"], options["seed"])
+            queries = self._get_queries()
+
+            with connection.schema_editor() as schema_editor:
+                for index in Transaction._meta.indexes:
+                    schema_editor.remove_index(Transaction, index)
+            without = self._measure(queries, options["repeat"])
+
+            with connection.schema_editor() as schema_editor:
+                for index in Transaction._meta.indexes:
+                    schema_editor.add_index(Transaction, index)
+            self._analyze()
+            with_indexes = self._measure(queries, options["repeat"])
+
+            self._report(queries, without, with_indexes)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _seed(self, rows, seed):
+        self.stdout.write(f"Seeding {rows} transactions...")
+        # Ending at the current time gives the "today" queries rows to find
+        seed_transactions(rows, seed=seed, end=timezone.now())
+        self._analyze()
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Transaction._meta.db_table}")
+
+    def _get_queries(self):
+        middle = Transaction.objects.newest_first().values_list(
+            "transaction_date", "id"
+        )[Transaction.objects.count() // 2]
+        today = timezone.localdate()
+        start_of_today = timezone.localtime().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        return {
+            "first page": lambda: Transaction.objects.newest_first()[:11],
+            "keyset page (mid-ledger)": lambda: (
+                Transaction.objects.newest_first().before(*middle)[:11]
+            ),
+            "latest balance": lambda: (
+                Transaction.objects.newest_first().values_list(
+                    "running_balance", flat=True
+                )[:1]
+            ),
+            # The __date cast used by the form cannot use an index on
+            # transaction_date, the equivalent range can
+            "expenses today (__date)": lambda: Transaction.objects.filter(
+                type="expense", transaction_date__date=today
+            ).values("id"),
+            "expenses today (range)": lambda: Transaction.objects.filter(
+                type="expense", transaction_date__gte=start_of_today
+            ).values("id"),
+            "admin type filter": lambda: Transaction.objects.filter(
+                type="expense"
+            ).order_by("-transaction_date")[:100],
+            "admin created_at filter": lambda: Transaction.objects.filter(
+                created_at__gte=timezone.now() - timedelta(days=7)
+            ).order_by("-transaction_date")[:100],
+        }
+
+    def _measure(self, queries, repeat):
+        results = {}
+        for name, build in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(build())
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            results[name] = {
+                "plan": build().explain(),
+                "median_ms": timings[len(timings) // 2] * 1000,
+            }
+        return results
+
+    def _report(self, queries, without, with_indexes):
+        for name in queries:
+            before = without[name]
+            after = with_indexes[name]
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+            self.stdout.write(
+                f"  without indexes: {before['median_ms']:.2f} ms"
+            )
+            self.stdout.write(f"    {before['plan']}".replace("\n", "\n    "))
+            self.stdout.write(
+                f"  with indexes:    {after['median_ms']:.2f} ms"
+            )
+            self.stdout.write(f"    {after['plan']}".replace("\n", "\n    "))
@@ -0,0 +1,220 @@
+import json
+import platform
+import time
+import tracemalloc
+from datetime import timedelta
+from unittest.mock import patch
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.transactions import cache as ledger_cache
+from apps.transactions.forms import TransactionForm
+from apps.transactions.models import Transaction
+from apps.transactions.seeding import seed_transactions
+from apps.transactions.services import TransactionService
+from apps.transactions.views import PAGE_SIZE, _get_paginated_transactions
+
+
+class _StubAPIClient:
+    """Serves generated records in place of the upstream API"""
+
+    def __init__(self, records):
+        self.records = records
+
+    def iter_transactions(self, order=None):
+        return iter(self.records)
+
+    def close(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the ledger hot paths at several ledger sizes on a throwaway "
+        "seeded test database, recording query counts and peak memory "
+        "as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000, 1_000_000],
+            help="Ledger sizes to benchmark",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timed runs per path, the median is reported",
+        )
+        parser.add_argument(
+            "--import-records",
+            type=int,
+            default=1000,
+            help="New records served to each API import run",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--label",
+            default="",
+            help="Stored with the results, e.g. a commit hash",
+        )
+        parser.add_argument(
+            "--output", help="JSON file to write instead of standard output"
+        )
+
+    def handle(self, *args, **options):
+        self.import_runs = 0
+        results = []
+
+        # Never touch the real database: seed a test database instead
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=False
+        )
+        try:
+            for rows in sorted(options["sizes"]):
+                Transaction.objects.all().delete()
+                self.stderr.write(f"Seeding {rows} transactions...")
+                seed_transactions(rows, seed=options["seed"])
+
+                for name, (prepare, run) in self._get_paths(
+                    rows, options["import_records"]
+                ).items():
+                    self.stderr.write(f"  {name}")
+                    results.append(
+                        {
+                            "rows": rows,
+                            "path": name,
+                            **self._measure(prepare, run, options["repeat"]),
+                        }
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = json.dumps(
+            {
+                "label": options["label"],
+                "created_at": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "repeat": options["repeat"],
+                "results": results,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report + "\n")
+        else:
+            self.stdout.write(report)
+
+    def _get_paths(self, rows, import_records):
+        """Benchmarked paths, name: (untimed preparation or None, run)"""
+        middle_page = max(rows // PAGE_SIZE // 2, 1)
+        middle = Transaction.objects.newest_first().values_list(
+            "transaction_date", "id"
+        )[rows // 2]
+        newest = Transaction.objects.newest_first()
+        expense = {"type": "expense", "amount": "1.00"}
+        return {
+            "_get_paginated_transactions first page": (
+                None,
+                lambda: list(_get_paginated_transactions(1)),
+            ),
+            "_get_paginated_transactions middle page": (
+                None,
+                lambda: list(_get_paginated_transactions(middle_page)),
+            ),
+            "keyset middle page, stored running_balance": (
+                None,
+                lambda: list(newest.before(*middle)[: PAGE_SIZE + 1]),
+            ),
+            "with_window_balance first page": (
+                None,
+                lambda: list(newest.with_window_balance()[: PAGE_SIZE + 1]),
+            ),
+            "with_window_balance keyset middle page": (
+                None,
+                lambda: list(
+                    newest.before(*middle).with_window_balance()[
+                        : PAGE_SIZE + 1
+                    ]
+                ),
+            ),
+            "Transaction.get_current_balance cold": (
+                ledger_cache.bump_ledger_version,
+                Transaction.get_current_balance,
+            ),
+            "Transaction.get_current_balance warm": (
+                Transaction.get_current_balance,
+                Transaction.get_current_balance,
+            ),
+            "TransactionForm.clean": (
+                ledger_cache.bump_ledger_version,
+                lambda: TransactionForm(data=expense).is_valid(),
+            ),
+            # Last, as every run adds rows
+            "TransactionService.import_transactions_from_api": (
+                None,
+                lambda: self._run_import(import_records),
+            ),
+        }
+
+    def _run_import(self, count):
+        """Import `count` new records, newer than every stored row"""
+        self.import_runs += 1
+        newest = timezone.now() + timedelta(days=self.import_runs)
+        records = [
+            {
+                "id": f"BENCH-{self.import_runs}-{i:06d}",
+                "amount": 10,
+                "type": "deposit",
+                "createdAt": (newest + timedelta(seconds=i)).isoformat(),
+            }
+            for i in range(count)
+        ]
+        with patch(
+            "apps.transactions.services.TransactionAPIClient",
+            lambda: _StubAPIClient(records),
+        ):
+            TransactionService.import_transactions_from_api(incremental=False)
+
+    def _measure(self, prepare, run, repeat):
+        stats = ledger_cache.get_balance_stats()
+        timings = []
+        for _ in range(repeat):
+            if prepare is not None:
+                prepare()
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+
+        # Queries and memory from one more, untimed run
+        if prepare is not None:
+            prepare()
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        stats = {
+            name: count - stats[name]
+            for name, count in ledger_cache.get_balance_stats().items()
+        }
+
+        return {
+            "median_ms": round(timings[len(timings) // 2] * 1000, 3),
+            "min_ms": round(timings[0] * 1000, 3),
+            "max_ms": round(timings[-1] * 1000, 3),
+            "queries": len(queries),
+            "peak_memory_kib": round(peak / 1024, 1),
+            # Over every run, timed or not
+            "balance_cache_hits": stats["hits"],
+            "balance_cache_misses": stats["misses"],
+        }
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from apps.transactions.export import EXPORT_FORMATS, iter_ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the ledger with running balances as CSV or NDJSON, "
+        "in constant memory"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=sorted(EXPORT_FORMATS),
+            default="csv",
+            dest="export_format",
+        )
+        parser.add_argument(
+            "--start", help="Only rows dated at or after this ISO datetime"
+        )
+        parser.add_argument(
+            "--end", help="Only rows dated at or before this ISO datetime"
+        )
+        parser.add_argument(
+            "--output", help="File to write to instead of standard output"
+        )
+
+    def handle(self, *args, **options):
+        start = self._parse_datetime(options, "start")
+        end = self._parse_datetime(options, "end")
+        generate_lines, _ = EXPORT_FORMATS[options["export_format"]]
+        lines = generate_lines(iter_ledger(start, end))
+
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
+
+    def _parse_datetime(self, options, name):
+        value = options[name]
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise CommandError(f"--{name} must be an ISO 8601 datetime")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
@@ -0,0 +1,31 @@
+from datetime import datetime, time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from apps.transactions.models import BalanceSnapshot
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily and monthly balance snapshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help=(
+                "Only rebuild the periods from this date (YYYY-MM-DD) on, "
+                "keeping earlier snapshots"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            day = parse_date(options["since"])
+            if day is None:
+                raise CommandError("--since must be a YYYY-MM-DD date")
+            since = timezone.make_aware(datetime.combine(day, time.min))
+
+        written = BalanceSnapshot.objects.rebuild(since=since)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {written} balance snapshots")
+        )
@@ -0,0 +1,62 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from apps.core.api_client import TransactionAPIClient
+from apps.transactions import cache as ledger_cache
+from apps.transactions.models import ImportJob
+from apps.transactions.services import TransactionService
+
+
+class Command(BaseCommand):
+    help = "Run queued API import jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no pending job is left instead of polling",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls for new jobs",
+        )
+
+    def handle(self, *args, **options):
+        if ledger_cache.is_process_local():
+            # Web processes would never see the worker's invalidations
+            # and keep serving the balance from before each import
+            raise CommandError(
+                "The import worker needs a cache shared with the web "
+                "processes, set CACHE_BACKEND and CACHE_LOCATION"
+            )
+
+        self.stdout.write("Import worker started")
+        # One client for the worker's lifetime, so every import reuses its
+        # pooled keep-alive connections
+        api_client = TransactionAPIClient()
+        try:
+            self._run_jobs(api_client, options)
+        finally:
+            api_client.close()
+
+    def _run_jobs(self, api_client, options):
+        while True:
+            job = ImportJob.objects.claim_next()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Running import job {job.pk}")
+            job = TransactionService.run_import_job(job, api_client)
+            if job.status == ImportJob.STATUS_SUCCEEDED:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Import job {job.pk} done: {job.created_count} "
+                        f"created, {job.skipped_count} skipped"
+                    )
+                )
+            else:
+                self.stderr.write(f"Import job {job.pk} failed: {job.error}")
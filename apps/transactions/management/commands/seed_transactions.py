@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from apps.transactions.models import Transaction
+from apps.transactions.seeding import SEED_END, seed_transactions
+
+
+class Command(BaseCommand):
+    help = "Bulk insert reproducible random transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10_000,
+            help="Number of transactions to create",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed, the same seed yields the same transactions",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Spread the transactions over this many days before --end",
+        )
+        parser.add_argument(
+            "--end",
+            help=(
+                "ISO datetime the seeded ledger ends at, "
+                f"{SEED_END.isoformat()} by default"
+            ),
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete every existing transaction first",
+        )
+
+    def handle(self, *args, **options):
+        end = SEED_END
+        if options["end"]:
+            end = parse_datetime(options["end"])
+            if end is None:
+                raise CommandError("--end must be an ISO 8601 datetime")
+            if timezone.is_naive(end):
+                end = timezone.make_aware(end)
+
+        if options["clear"]:
+            Transaction.objects.all().delete()
+
+        created_count = seed_transactions(
+            options["rows"],
+            seed=options["seed"],
+            days=options["days"],
+            end=end,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {created_count} transactions, skipped "
+                f"{options['rows'] - created_count} already stored"
+            )
+        )
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:53
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_running_balances(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    balance = Decimal("0")
+    batch = []
+    # Stream the ledger instead of caching every row of the queryset
+    for tx in (
+        Transaction.objects.order_by("transaction_date", "id")
+        .only("id", "amount", "type")
+        .iterator(chunk_size=1000)
+    ):
+        balance += -tx.amount if tx.type == "expense" else tx.amount
+        tx.running_balance = balance
+        batch.append(tx)
+        if len(batch) >= 1000:
+            Transaction.objects.bulk_update(batch, ["running_balance"])
+            batch = []
+    Transaction.objects.bulk_update(batch, ["running_balance"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0003_alter_transaction_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="running_balance",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=14
+            ),
+        ),
+        migrations.RunPython(
+            backfill_running_balances, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0004_transaction_running_balance"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("source", models.CharField(max_length=50, unique=True)),
+                ("last_created_at", models.DateTimeField(blank=True, null=True)),
+                ("last_transaction_code", models.CharField(blank=True, max_length=20)),
+            ],
+            options={
+                "verbose_name": "Import state",
+                "verbose_name_plural": "Import states",
+            },
+        ),
+    ]
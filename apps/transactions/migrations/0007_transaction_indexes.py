@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0006_importjob"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["transaction_date", "id"],
+                include=("running_balance",),
+                name="txn_date_id_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["type", "transaction_date"], name="txn_type_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(fields=["created_at"], name="txn_created_at_idx"),
+        ),
+    ]
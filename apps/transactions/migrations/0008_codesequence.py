@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0007_transaction_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CodeSequence",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("last_value", models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
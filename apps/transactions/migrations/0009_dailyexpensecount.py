@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:04
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_expense_counts(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    DailyExpenseCount = apps.get_model("transactions", "DailyExpenseCount")
+    DailyExpenseCount.objects.bulk_create(
+        DailyExpenseCount(day=day, count=count)
+        for day, count in Transaction.objects.filter(type="expense")
+        .order_by()
+        .values_list(TruncDate("transaction_date"))
+        .annotate(count=Count("id"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0008_codesequence"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyExpenseCount",
+            fields=[
+                ("day", models.DateField(primary_key=True, serialize=False)),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(
+            backfill_daily_expense_counts, migrations.RunPython.noop
+        ),
+    ]
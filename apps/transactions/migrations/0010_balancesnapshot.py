@@ -0,0 +1,106 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:07
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+
+
+def backfill_balance_snapshots(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    BalanceSnapshot = apps.get_model("transactions", "BalanceSnapshot")
+    truncs = {
+        "day": TruncDate("transaction_date"),
+        "month": TruncMonth("transaction_date", output_field=DateField()),
+    }
+    for period, trunc in truncs.items():
+        balance = Decimal("0")
+        snapshots = []
+        for row in (
+            Transaction.objects.order_by()
+            .annotate(start=trunc)
+            .values("start")
+            .annotate(
+                deposits=Sum(
+                    "amount", filter=Q(type="deposit"), default=Decimal("0")
+                ),
+                expenses=Sum(
+                    "amount", filter=Q(type="expense"), default=Decimal("0")
+                ),
+                count=Count("id"),
+            )
+            .order_by("start")
+        ):
+            closing = balance + row["deposits"] - row["expenses"]
+            snapshots.append(
+                BalanceSnapshot(
+                    period=period,
+                    opening_balance=balance,
+                    closing_balance=closing,
+                    **row,
+                )
+            )
+            balance = closing
+        BalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0009_dailyexpensecount"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("day", "Day"), ("month", "Month")], max_length=5
+                    ),
+                ),
+                ("start", models.DateField()),
+                (
+                    "opening_balance",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "deposits",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "expenses",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "closing_balance",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Balance snapshot",
+                "verbose_name_plural": "Balance snapshots",
+                "ordering": ["period", "start"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("period", "start"), name="balance_snapshot_period_uniq"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(
+            backfill_balance_snapshots, migrations.RunPython.noop
+        ),
+    ]
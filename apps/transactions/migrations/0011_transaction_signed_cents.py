@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:26
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0010_balancesnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="signed_cents",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.comparison.Cast(
+                    django.db.models.functions.math.Round(
+                        django.db.models.expressions.CombinedExpression(
+                            models.Case(
+                                models.When(
+                                    then=django.db.models.expressions.CombinedExpression(
+                                        models.F("amount"), "*", models.Value(-1)
+                                    ),
+                                    type="expense",
+                                ),
+                                default=models.F("amount"),
+                                output_field=models.DecimalField(
+                                    decimal_places=2, max_digits=14
+                                ),
+                            ),
+                            "*",
+                            models.Value(100),
+                        )
+                    ),
+                    models.BigIntegerField(),
+                ),
+                output_field=models.BigIntegerField(),
+            ),
+        ),
+    ]
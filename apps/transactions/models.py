@@ -1,5 +1,258 @@
-from django.db import models
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connections, models, transaction as db_transaction
+from django.db.models import (
+    BigIntegerField,
+    Case,
+    Count,
+    DateField,
+    F,
+    Max,
+    Q,
+    RowRange,
+    Sum,
+    When,
+    Window,
+)
+from django.db.models.functions import (
+    Cast,
+    Round,
+    Substr,
+    TruncDate,
+    TruncMonth,
+)
+from django.utils import timezone
 from apps.core.models import TimestampedModel
+from . import cache as ledger_cache
+
+LEDGER_FIELDS = {"amount", "type", "transaction_date"}
+
+DAILY_EXPENSE_LIMIT = 200
+# Running import jobs older than this are taken to have lost their worker
+IMPORT_JOB_TIMEOUT = timedelta(hours=1)
+TRANSACTION_CODE_PREFIX = "TXN-"
+TRANSACTION_CODE_SEQUENCE = "transaction_code"
+# Ledger write lock: a PostgreSQL advisory lock key, elsewhere the name of
+# the CodeSequence row updated to take it
+LEDGER_LOCK_KEY = 0x6C6564676572
+LEDGER_LOCK = "ledger"
+
+# Amount with the sign implied by the transaction type, as a SQL expression
+SIGNED_AMOUNT = Case(
+    When(type="expense", then=-F("amount")),
+    default=F("amount"),
+    output_field=models.DecimalField(max_digits=14, decimal_places=2),
+)
+
+CENT = Decimal("0.01")
+
+
+def _cents(expression):
+    """SQL expression converting a decimal amount to integer cents"""
+    return Cast(Round(expression * 100), BigIntegerField())
+
+
+def from_cents(cents):
+    """Decimal amount of an integer number of cents"""
+    return (Decimal(cents) / 100).quantize(CENT)
+
+
+def to_cents(amount):
+    """Integer cents of a decimal amount"""
+    return int(amount * 100)
+
+
+def format_cents(cents):
+    """Decimal string of an integer number of cents, e.g. -1205 -> -12.05"""
+    sign = "-" if cents < 0 else ""
+    whole, part = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{part:02d}"
+
+
+def lock_ledger(using="default"):
+    """
+    Serialize ledger writers until the surrounding transaction ends.
+    Stored running balances, snapshots and expense counters are updated
+    from values read earlier in the same transaction, so every write path
+    takes this before its first read. PostgreSQL takes a transaction-level
+    advisory lock, other databases update a CodeSequence row, which stays
+    locked until commit (on SQLite, the whole database)
+    """
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        raise db_transaction.TransactionManagementError(
+            "lock_ledger() must be called inside atomic()"
+        )
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(%s)", [LEDGER_LOCK_KEY]
+            )
+        return
+
+    locks = CodeSequence.objects.using(using).filter(name=LEDGER_LOCK)
+    if not locks.update(last_value=F("last_value") + 1):
+        CodeSequence.objects.using(using).get_or_create(name=LEDGER_LOCK)
+        locks.update(last_value=F("last_value") + 1)
+
+
+class TransactionQuerySet(models.QuerySet):
+
+    def chronological(self):
+        """Oldest first, the order running balances accumulate in"""
+        return self.order_by("transaction_date", "id")
+
+    def newest_first(self):
+        return self.order_by("-transaction_date", "-id")
+
+    def before(self, transaction_date, pk):
+        """Rows that precede the (transaction_date, pk) ledger position"""
+        # The redundant plain bound lets the planner start an index range
+        # scan at the position, which it cannot derive from the OR alone
+        return self.filter(
+            Q(transaction_date__lt=transaction_date)
+            | Q(transaction_date=transaction_date, id__lt=pk),
+            transaction_date__lte=transaction_date,
+        )
+
+    def after(self, transaction_date, pk):
+        """Rows that follow the (transaction_date, pk) ledger position"""
+        return self.filter(
+            Q(transaction_date__gt=transaction_date)
+            | Q(transaction_date=transaction_date, id__gt=pk),
+            transaction_date__gte=transaction_date,
+        )
+
+    def between(self, start=None, end=None):
+        """Rows dated within [start, end], either bound being optional"""
+        queryset = self
+        if start is not None:
+            queryset = queryset.filter(transaction_date__gte=start)
+        if end is not None:
+            queryset = queryset.filter(transaction_date__lte=end)
+        return queryset
+
+    def balance(self):
+        """Sum of signed amounts, computed with a single SQL aggregate"""
+        total = self.aggregate(total=Sum("signed_cents"))["total"]
+        return from_cents(total or 0)
+
+    def with_window_balance(self):
+        """
+        Annotate window_balance, each row's running balance computed by the
+        database as SUM(signed amount) OVER (ORDER BY transaction_date, id).
+        The window spans every row the queryset matches before slicing, so
+        a sliced page still reads exact balances for just its own rows.
+        It matches the stored running_balance only while no earlier row is
+        filtered out, i.e. on the whole ledger or a prefix from before()
+        """
+        # Rounded to cents because SQLite sums decimals as floats
+        return self.annotate(
+            window_balance=Round(
+                Window(
+                    Sum(SIGNED_AMOUNT),
+                    order_by=[F("transaction_date").asc(), F("id").asc()],
+                    frame=RowRange(start=None, end=0),
+                ),
+                2,
+            )
+        )
+
+    async def abalance(self):
+        """Async balance(), for async views"""
+        total = (await self.aaggregate(total=Sum("signed_cents")))["total"]
+        return from_cents(total or 0)
+
+    def delete(self):
+        # Bulk deletes bypass Transaction.delete(), so re-accumulate the
+        # stored balances from the earliest removed row onwards instead.
+        with db_transaction.atomic():
+            lock_ledger()
+            earliest = (
+                self.order_by("transaction_date")
+                .values_list("transaction_date", flat=True)
+                .first()
+            )
+            expense_days = list(
+                self.filter(type="expense")
+                .order_by()
+                .values_list(TruncDate("transaction_date"))
+                .annotate(count=Count("id"))
+            )
+            result = super().delete()
+            for day, count in expense_days:
+                DailyExpenseCount.objects.increment(day, -count)
+            if earliest is not None:
+                self.model.objects.rebuild_running_balances(since=earliest)
+                BalanceSnapshot.objects.rebuild(since=earliest)
+                ledger_cache.invalidate_ledger(
+                    refresh=self.model.objects.latest_balance
+                )
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class DailyExpenseLimitReached(Exception):
+    """Raised when saving an expense would exceed the daily limit"""
+
+
+class TransactionManager(models.Manager.from_queryset(TransactionQuerySet)):
+
+    def latest_balance(self):
+        """Running balance of the newest row, i.e. the ledger total"""
+        balance = (
+            self.newest_first()
+            .values_list("running_balance", flat=True)
+            .first()
+        )
+        return balance if balance is not None else Decimal("0")
+
+    def rebuild_running_balances(self, since=None, batch_size=1000):
+        """
+        Recompute stored running balances for rows dated `since` or later
+        (the whole ledger when `since` is None), walking the ledger in
+        keyset batches so memory stays bounded.
+        Returns number of rows whose balance changed
+        """
+        # Balances are accumulated in integer cents, the stored ones being
+        # read as cents too, so the loop does no Decimal arithmetic
+        rows = (
+            self.chronological()
+            .only("id", "transaction_date", "signed_cents")
+            .annotate(running_cents=_cents(F("running_balance")))
+        )
+        balance = 0
+        if since is not None:
+            rows = rows.filter(transaction_date__gte=since)
+            opening = (
+                self.filter(transaction_date__lt=since)
+                .newest_first()
+                .values_list("running_balance", flat=True)
+                .first()
+            )
+            balance = to_cents(opening) if opening is not None else 0
+
+        updated_count = 0
+        batch = list(rows[:batch_size])
+        while batch:
+            changed = []
+            for tx in batch:
+                balance += tx.signed_cents
+                if tx.running_cents != balance:
+                    tx.running_balance = from_cents(balance)
+                    changed.append(tx)
+            self.bulk_update(changed, ["running_balance"])
+            updated_count += len(changed)
+
+            last = batch[-1]
+            batch = list(
+                rows.after(last.transaction_date, last.pk)[:batch_size]
+            )
+        return updated_count
 
 
 class Transaction(TimestampedModel):
@@ -9,21 +262,690 @@ class Transaction(TimestampedModel):
         max_length=10, choices=[("deposit", "Deposit"), ("expense", "Expense")]
     )
     transaction_date = models.DateTimeField()
+    running_balance = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    # The amount in integer cents, negative for expenses, kept by the
+    # database so sums and balance loops run on plain integers
+    signed_cents = models.GeneratedField(
+        expression=_cents(SIGNED_AMOUNT),
+        output_field=BigIntegerField(),
+        db_persist=True,
+    )
+
+    objects = TransactionManager()
 
     class Meta:
         ordering = ["-transaction_date"]
         verbose_name = "Transaction"
         verbose_name_plural = "Transactions"
+        indexes = [
+            # Ledger order: pages, keyset cursors and balance lookups.
+            # On PostgreSQL the included balance allows index-only scans
+            models.Index(
+                fields=["transaction_date", "id"],
+                include=["running_balance"],
+                name="txn_date_id_idx",
+            ),
+            # Per-type filters over a date range (daily expense limit)
+            models.Index(
+                fields=["type", "transaction_date"], name="txn_type_date_idx"
+            ),
+            # Admin changelist date filter
+            models.Index(fields=["created_at"], name="txn_created_at_idx"),
+        ]
 
     def get_signed_amount(self):
         """Return amount with proper sign for calculations"""
         return -self.amount if self.type == "expense" else self.amount
 
+    @classmethod
+    def allocate_codes(cls, count=1):
+        """
+        Hand out `count` unused TXN- codes in constant time.
+        Codes written without the allocator are detected with one indexed
+        lookup, after which the sequence is moved past them
+        """
+        while True:
+            codes = [
+                f"{TRANSACTION_CODE_PREFIX}{value:04d}"
+                for value in CodeSequence.objects.allocate(
+                    TRANSACTION_CODE_SEQUENCE, count
+                )
+            ]
+            if not cls.objects.filter(transaction_code__in=codes).exists():
+                return codes
+
+            highest = cls.objects.filter(
+                transaction_code__startswith=TRANSACTION_CODE_PREFIX
+            ).aggregate(
+                highest=Max(
+                    Cast(
+                        Substr(
+                            "transaction_code",
+                            len(TRANSACTION_CODE_PREFIX) + 1,
+                        ),
+                        BigIntegerField(),
+                    )
+                )
+            )[
+                "highest"
+            ]
+            CodeSequence.objects.advance(TRANSACTION_CODE_SEQUENCE, highest)
+
     @classmethod
     def get_current_balance(cls):
-        """Calculate total current balance"""
-        transactions = cls.objects.all()
-        return sum(tx.get_signed_amount() for tx in transactions)
+        """Calculate total current balance, served from cache when fresh"""
+        return ledger_cache.get_balance(cls.objects.balance)
+
+    @classmethod
+    async def aget_current_balance(cls):
+        """Async get_current_balance(), for async views"""
+        return await ledger_cache.aget_balance(cls.objects.abalance)
+
+    def get_local_day(self):
+        """Calendar day of transaction_date in the current time zone"""
+        if timezone.is_naive(self.transaction_date):
+            return self.transaction_date.date()
+        return timezone.localdate(self.transaction_date)
+
+    def get_expense_day(self):
+        """Local calendar day this row counts against, None for deposits"""
+        if self.type != "expense":
+            return None
+        return self.get_local_day()
+
+    def save(self, *args, expense_limit=None, **kwargs):
+        """
+        Save and keep stored running balances consistent: the row takes
+        its predecessor's balance plus its own signed amount, and every
+        later row is shifted by the difference in one UPDATE. Only rows
+        after the changed position are touched, never the whole ledger.
+        With `expense_limit`, raises DailyExpenseLimitReached instead of
+        saving an expense that would exceed it for its day
+        """
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            if not LEDGER_FIELDS.intersection(update_fields):
+                return super().save(*args, **kwargs)
+            kwargs["update_fields"] = {*update_fields, "running_balance"}
+
+        for name in LEDGER_FIELDS - {"type"}:
+            field = self._meta.get_field(name)
+            setattr(self, name, field.to_python(getattr(self, name)))
+
+        with db_transaction.atomic():
+            lock_ledger()
+            stored = self._get_stored()
+            if not DailyExpenseCount.objects.move(
+                stored.get_expense_day() if stored is not None else None,
+                self.get_expense_day(),
+                limit=expense_limit,
+            ):
+                raise DailyExpenseLimitReached(
+                    "Your daily expense limit reached."
+                )
+
+            BalanceSnapshot.objects.record(removed=stored, added=self)
+
+            if (
+                stored is not None
+                and stored.transaction_date == self.transaction_date
+            ):
+                # Same ledger position: every balance from here on moves
+                # by the change in signed amount, one UPDATE for all
+                delta = self.get_signed_amount() - stored.get_signed_amount()
+                self.running_balance = stored.running_balance + delta
+                super().save(*args, **kwargs)
+                if delta:
+                    self._shift_later_balances(delta)
+            else:
+                if stored is not None:
+                    stored._shift_later_balances(-stored.get_signed_amount())
+                self.running_balance = (
+                    self._get_opening_balance() + self.get_signed_amount()
+                )
+                super().save(*args, **kwargs)
+                self._shift_later_balances(self.get_signed_amount())
+            ledger_cache.invalidate_ledger(
+                refresh=Transaction.objects.latest_balance
+            )
+
+    def delete(self, *args, **kwargs):
+        with db_transaction.atomic():
+            lock_ledger()
+            stored = self._get_stored()
+            if stored is not None:
+                stored._shift_later_balances(-stored.get_signed_amount())
+                DailyExpenseCount.objects.move(stored.get_expense_day(), None)
+                BalanceSnapshot.objects.record(removed=stored)
+            result = super().delete(*args, **kwargs)
+            ledger_cache.invalidate_ledger(
+                refresh=Transaction.objects.latest_balance
+            )
+            return result
+
+    def _get_stored(self):
+        """Return the persisted version of this row, if any"""
+        if self.pk is None:
+            return None
+        return (
+            Transaction.objects.filter(pk=self.pk)
+            .only(
+                "id", "amount", "type", "transaction_date", "running_balance"
+            )
+            .first()
+        )
+
+    def _get_opening_balance(self):
+        """Running balance of the row directly before this one"""
+        if self.pk is None:
+            # A new row gets the highest id, so it follows every row
+            # sharing its transaction_date
+            preceding = Transaction.objects.filter(
+                transaction_date__lte=self.transaction_date
+            )
+        else:
+            # A row moved later still sits at its old, earlier position,
+            # with its stale balance, until it is saved
+            preceding = Transaction.objects.before(
+                self.transaction_date, self.pk
+            ).exclude(pk=self.pk)
+        balance = (
+            preceding.newest_first()
+            .values_list("running_balance", flat=True)
+            .first()
+        )
+        return balance if balance is not None else Decimal("0")
+
+    def _shift_later_balances(self, delta):
+        Transaction.objects.after(self.transaction_date, self.pk).update(
+            running_balance=F("running_balance") + delta
+        )
 
     def __str__(self):
         return f"{self.transaction_code} - {self.type} - ${self.amount}"
+
+
+class ImportState(TimestampedModel):
+    """High-water mark of the newest record imported from a source"""
+
+    source = models.CharField(max_length=50, unique=True)
+    last_created_at = models.DateTimeField(null=True, blank=True)
+    last_transaction_code = models.CharField(max_length=20, blank=True)
+
+    class Meta:
+        verbose_name = "Import state"
+        verbose_name_plural = "Import states"
+
+    def __str__(self):
+        return f"{self.source} @ {self.last_created_at}"
+
+
+class ImportJobQuerySet(models.QuerySet):
+
+    def active(self):
+        """Pending jobs and running ones that have not gone stale"""
+        return self.filter(
+            Q(status=ImportJob.STATUS_PENDING)
+            | Q(
+                status=ImportJob.STATUS_RUNNING,
+                started_at__gte=timezone.now() - IMPORT_JOB_TIMEOUT,
+            )
+        )
+
+    def fail_stale(self):
+        """
+        Mark jobs running for longer than IMPORT_JOB_TIMEOUT as failed,
+        as their worker died. The import runs in one database transaction,
+        so a dead worker's rows were rolled back and a new job can redo it.
+        Returns number of jobs failed
+        """
+        now = timezone.now()
+        return self.filter(
+            status=ImportJob.STATUS_RUNNING,
+            started_at__lt=now - IMPORT_JOB_TIMEOUT,
+        ).update(
+            status=ImportJob.STATUS_FAILED,
+            error="The import worker stopped before finishing this job.",
+            finished_at=now,
+        )
+
+    def claim_next(self):
+        """
+        Mark the oldest pending job as running and return it, or None.
+        The conditional UPDATE lets several workers poll the same table
+        without running a job twice. Stale running jobs are failed first
+        """
+        self.fail_stale()
+        for job in self.filter(status=ImportJob.STATUS_PENDING).order_by(
+            "created_at", "id"
+        )[:10]:
+            claimed = ImportJob.objects.filter(
+                pk=job.pk, status=ImportJob.STATUS_PENDING
+            ).update(
+                status=ImportJob.STATUS_RUNNING, started_at=timezone.now()
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return None
+
+
+class ImportJob(TimestampedModel):
+    """API import queued by the web app and run by the import worker"""
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+
+    status = models.CharField(
+        max_length=10,
+        choices=[
+            (STATUS_PENDING, "Pending"),
+            (STATUS_RUNNING, "Running"),
+            (STATUS_SUCCEEDED, "Succeeded"),
+            (STATUS_FAILED, "Failed"),
+        ],
+        default=STATUS_PENDING,
+    )
+    incremental = models.BooleanField(default=True)
+    concurrent = models.BooleanField(default=False)
+    created_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ImportJobQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Import job"
+        verbose_name_plural = "Import jobs"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+    def __str__(self):
+        return f"Import job {self.pk} - {self.status}"
+
+
+class CodeSequenceManager(models.Manager):
+    """
+    Gap-tolerant counters. PostgreSQL uses a native sequence per name,
+    other databases a counter row updated in place, which the UPDATE
+    locks until the surrounding transaction ends
+    """
+
+    def _get_sequence(self, name):
+        """Return (connection, quoted sequence name) if PostgreSQL is used"""
+        connection = connections[self.db]
+        if connection.vendor != "postgresql":
+            return connection, None
+        return connection, connection.ops.quote_name(
+            f"transactions_{name}_seq"
+        )
+
+    def create_sequence(self, name):
+        """Create the PostgreSQL sequence backing `name` if missing"""
+        connection, sequence = self._get_sequence(name)
+        if sequence is not None:
+            with connection.cursor() as cursor:
+                cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {sequence}")
+
+    def allocate(self, name, count=1):
+        """Reserve and return `count` new values of sequence `name`"""
+        connection, sequence = self._get_sequence(name)
+        if sequence is not None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT nextval('{sequence}') "
+                    "FROM generate_series(1, %s)",
+                    [count],
+                )
+                return [row[0] for row in cursor.fetchall()]
+
+        with db_transaction.atomic(using=self.db):
+            if not self.filter(name=name).update(
+                last_value=F("last_value") + count
+            ):
+                self.get_or_create(name=name)
+                self.filter(name=name).update(
+                    last_value=F("last_value") + count
+                )
+            last_value = self.filter(name=name).values_list(
+                "last_value", flat=True
+            )[0]
+        return list(range(last_value - count + 1, last_value + 1))
+
+    def advance(self, name, value):
+        """Make sure the next value handed out is above `value`"""
+        if not value:
+            return
+        connection, sequence = self._get_sequence(name)
+        if sequence is not None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT setval('{sequence}', GREATEST(%s, last_value)) "
+                    f"FROM {sequence}",
+                    [value],
+                )
+            return
+
+        self.get_or_create(name=name)
+        self.filter(name=name, last_value__lt=value).update(last_value=value)
+
+
+class CodeSequence(models.Model):
+    """Counter row backing CodeSequenceManager outside PostgreSQL"""
+
+    name = models.CharField(max_length=50, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+
+    objects = CodeSequenceManager()
+
+    def __str__(self):
+        return f"{self.name} = {self.last_value}"
+
+
+class DailyExpenseCountManager(models.Manager):
+
+    def get_count(self, day):
+        """Number of expenses dated on `day`, one primary key lookup"""
+        count = self.filter(day=day).values_list("count", flat=True).first()
+        return count or 0
+
+    def increment(self, day, amount=1, limit=None):
+        """
+        Add `amount` to the counter of `day`. With `limit`, the counter is
+        only raised if it stays within the limit, checked and applied in
+        one conditional UPDATE so parallel writers cannot overshoot it.
+        Returns whether the counter was changed
+        """
+        counters = self.filter(day=day)
+        if limit is not None:
+            counters = counters.filter(count__lte=limit - amount)
+        if counters.update(count=F("count") + amount):
+            return True
+        if amount < 0 or (limit is not None and amount > limit):
+            return False
+
+        # No counter for the day yet, unless a parallel writer created it
+        # or the limit has been reached
+        _, created = self.get_or_create(day=day, defaults={"count": amount})
+        return created or bool(counters.update(count=F("count") + amount))
+
+    def move(self, old_day, new_day, limit=None):
+        """
+        Move one expense from `old_day` to `new_day`, either being None
+        for "not an expense". `limit` applies to `new_day`.
+        Returns whether the move was allowed
+        """
+        if old_day == new_day:
+            return True
+        if new_day is not None and not self.increment(new_day, 1, limit):
+            return False
+        if old_day is not None:
+            self.increment(old_day, -1)
+        return True
+
+    def rebuild(self):
+        """Recount every day from the Transaction table"""
+        with db_transaction.atomic():
+            self.all().delete()
+            self.bulk_create(
+                DailyExpenseCount(day=day, count=count)
+                for day, count in Transaction.objects.filter(type="expense")
+                .order_by()
+                .values_list(TruncDate("transaction_date"))
+                .annotate(count=Count("id"))
+            )
+
+
+class DailyExpenseCount(models.Model):
+    """Rollup of expenses per local calendar day for the daily limit"""
+
+    day = models.DateField(primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+
+    objects = DailyExpenseCountManager()
+
+    def __str__(self):
+        return f"{self.day}: {self.count} expenses"
+
+
+def _start_of_day(day):
+    """Aware datetime of midnight starting `day` in the current time zone"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class BalanceSnapshotManager(models.Manager):
+
+    def record(self, removed=None, added=None):
+        """
+        Move one transaction's contribution between snapshots: `removed`
+        (its previously stored state) is taken out and `added` put in,
+        either being None. Changes to the same period are merged, so each
+        touched period costs one UPDATE plus one shifting later periods.
+        New periods open at the closing balance read before them, so the
+        caller must hold the ledger lock (see lock_ledger())
+        """
+        for period in BalanceSnapshot.PERIODS:
+            changes = defaultdict(lambda: [Decimal("0"), Decimal("0"), 0])
+            for transaction, sign in ((removed, -1), (added, 1)):
+                if transaction is None:
+                    continue
+                change = changes[
+                    BalanceSnapshot.get_period_start(
+                        period, transaction.get_local_day()
+                    )
+                ]
+                if transaction.type == "expense":
+                    change[1] += sign * transaction.amount
+                else:
+                    change[0] += sign * transaction.amount
+                change[2] += sign
+
+            for start, (deposits, expenses, count) in changes.items():
+                if deposits or expenses or count:
+                    self._apply(period, start, deposits, expenses, count)
+
+    def _apply(self, period, start, deposits, expenses, count):
+        snapshots = self.filter(period=period)
+        delta = deposits - expenses
+
+        def add_to_snapshot():
+            return snapshots.filter(start=start).update(
+                deposits=F("deposits") + deposits,
+                expenses=F("expenses") + expenses,
+                count=F("count") + count,
+                closing_balance=F("closing_balance") + delta,
+            )
+
+        updated = add_to_snapshot()
+        if not updated and count > 0:
+            # No snapshot for the period yet, unless a parallel writer
+            # created it since
+            opening = self._get_closing_before(period, start)
+            _, created = self.get_or_create(
+                period=period,
+                start=start,
+                defaults={
+                    "opening_balance": opening,
+                    "deposits": deposits,
+                    "expenses": expenses,
+                    "count": count,
+                    "closing_balance": opening + delta,
+                },
+            )
+            if not created:
+                add_to_snapshot()
+        elif updated and count < 0:
+            snapshots.filter(start=start, count=0).delete()
+
+        if delta:
+            snapshots.filter(start__gt=start).update(
+                opening_balance=F("opening_balance") + delta,
+                closing_balance=F("closing_balance") + delta,
+            )
+
+    def _get_closing_before(self, period, start):
+        """Closing balance of the last snapshot before `start`"""
+        balance = (
+            self.filter(period=period, start__lt=start)
+            .order_by("-start")
+            .values_list("closing_balance", flat=True)
+            .first()
+        )
+        return balance if balance is not None else Decimal("0")
+
+    async def _aget_closing_before(self, period, start):
+        balance = await (
+            self.filter(period=period, start__lt=start)
+            .order_by("-start")
+            .values_list("closing_balance", flat=True)
+            .afirst()
+        )
+        return balance if balance is not None else Decimal("0")
+
+    def balance_at(self, when):
+        """
+        Ledger balance at `when`, rows dated exactly then included: the
+        closing balance of the last day before it plus the rows of its
+        own day up to `when`. Both are index range reads, so the cost
+        does not grow with the length of the history
+        """
+        day = timezone.localdate(when)
+        return (
+            self._get_closing_before(BalanceSnapshot.PERIOD_DAY, day)
+            + Transaction.objects.between(_start_of_day(day), when).balance()
+        )
+
+    async def abalance_at(self, when):
+        """Async balance_at(), for async views"""
+        day = timezone.localdate(when)
+        return (
+            await self._aget_closing_before(BalanceSnapshot.PERIOD_DAY, day)
+            + await Transaction.objects.between(
+                _start_of_day(day), when
+            ).abalance()
+        )
+
+    def rebuild(self, since=None):
+        """
+        Recompute the snapshots of the periods containing `since` and
+        later (all of them when `since` is None) with one grouped
+        aggregate per period.
+        Returns number of snapshots written
+        """
+        written = 0
+        with db_transaction.atomic():
+            # Concurrent record() calls would update rows deleted here,
+            # or be overwritten by totals computed before they committed
+            lock_ledger()
+            for period in BalanceSnapshot.PERIODS:
+                snapshots = self.filter(period=period)
+                transactions = Transaction.objects.order_by()
+                balance = Decimal("0")
+                if since is not None:
+                    start = BalanceSnapshot.get_period_start(
+                        period, timezone.localdate(since)
+                    )
+                    snapshots = snapshots.filter(start__gte=start)
+                    transactions = transactions.filter(
+                        transaction_date__gte=_start_of_day(start)
+                    )
+                    balance = self._get_closing_before(period, start)
+                snapshots.delete()
+
+                totals = (
+                    transactions.annotate(
+                        start=BalanceSnapshot.get_period_trunc(period)
+                    )
+                    .values("start")
+                    .annotate(
+                        deposits=Sum(
+                            "amount",
+                            filter=Q(type="deposit"),
+                            default=Decimal("0"),
+                        ),
+                        expenses=Sum(
+                            "amount",
+                            filter=Q(type="expense"),
+                            default=Decimal("0"),
+                        ),
+                        count=Count("id"),
+                    )
+                    .order_by("start")
+                )
+                new_snapshots = []
+                for row in totals:
+                    closing = balance + row["deposits"] - row["expenses"]
+                    new_snapshots.append(
+                        BalanceSnapshot(
+                            period=period,
+                            opening_balance=balance,
+                            closing_balance=closing,
+                            **row,
+                        )
+                    )
+                    balance = closing
+                self.bulk_create(new_snapshots, batch_size=1000)
+                written += len(new_snapshots)
+        return written
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Per day and per month ledger rollup, so balances over time are read
+    from one row per period instead of replaying every transaction
+    """
+
+    PERIOD_DAY = "day"
+    PERIOD_MONTH = "month"
+    PERIODS = (PERIOD_DAY, PERIOD_MONTH)
+
+    period = models.CharField(
+        max_length=5,
+        choices=[(PERIOD_DAY, "Day"), (PERIOD_MONTH, "Month")],
+    )
+    start = models.DateField()
+    opening_balance = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )
+    deposits = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    closing_balance = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    objects = BalanceSnapshotManager()
+
+    class Meta:
+        ordering = ["period", "start"]
+        verbose_name = "Balance snapshot"
+        verbose_name_plural = "Balance snapshots"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "start"], name="balance_snapshot_period_uniq"
+            )
+        ]
+
+    @classmethod
+    def get_period_start(cls, period, day):
+        """First day of the `period` containing `day`"""
+        return day.replace(day=1) if period == cls.PERIOD_MONTH else day
+
+    @classmethod
+    def get_period_trunc(cls, period):
+        """SQL expression truncating transaction_date to `period` starts"""
+        if period == cls.PERIOD_MONTH:
+            return TruncMonth("transaction_date", output_field=DateField())
+        return TruncDate("transaction_date")
+
+    def __str__(self):
+        return f"{self.period} {self.start}: {self.closing_balance}"
@@ -0,0 +1,101 @@
+"""
+Reproducible bulk seeding of the ledger for benchmarks and local testing.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import transaction as db_transaction
+from . import cache as ledger_cache
+from .models import (
+    BalanceSnapshot,
+    DailyExpenseCount,
+    Transaction,
+    from_cents,
+    lock_ledger,
+)
+
+SEED_BATCH_SIZE = 5000
+# Seeded ledgers end here by default, so they do not depend on the clock
+SEED_END = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def seed_transactions(
+    rows, seed=42, days=365, end=SEED_END, batch_size=SEED_BATCH_SIZE
+):
+    """
+    Bulk insert `rows` random transactions spread evenly over the `days`
+    days before `end`. The same arguments always yield the same rows,
+    and rows of an earlier run with the same seed are skipped, so seeding
+    again only adds the missing ones. Rows are generated in ledger order
+    with their running balances, so only a ledger that already had rows
+    needs a balance rebuild afterwards.
+    Returns number of transactions created
+    """
+    rng = random.Random(seed)
+    span = timedelta(days=days)
+    start = end - span
+    # Evenly spread increasing offsets, without holding them all
+    max_gap = 2 * span / max(rows, 1)
+
+    offset = timedelta(0)
+    balance = 0
+    created_count = 0
+    first_date = None
+    batch = []
+
+    def insert_batch(batch):
+        nonlocal created_count, first_date
+        new_transactions = batch
+        if had_rows:
+            existing_codes = set(
+                Transaction.objects.filter(
+                    transaction_code__in=[tx.transaction_code for tx in batch]
+                )
+                .order_by()
+                .values_list("transaction_code", flat=True)
+            )
+            new_transactions = [
+                tx for tx in batch if tx.transaction_code not in existing_codes
+            ]
+        Transaction.objects.bulk_create(new_transactions)
+        created_count += len(new_transactions)
+        if new_transactions and first_date is None:
+            first_date = new_transactions[0].transaction_date
+
+    with db_transaction.atomic():
+        lock_ledger()
+        had_rows = Transaction.objects.exists()
+        for i in range(rows):
+            offset += max_gap * rng.random()
+            transaction_date = start + min(offset, span)
+            cents = rng.randint(1, 100_000)
+            # Slightly more deposits keep the balance positive, like a
+            # real ledger the expense checks pass on
+            transaction_type = "expense" if rng.random() < 0.45 else "deposit"
+            balance += -cents if transaction_type == "expense" else cents
+            batch.append(
+                Transaction(
+                    transaction_code=f"S{seed}-{i:08d}",
+                    amount=from_cents(cents),
+                    type=transaction_type,
+                    transaction_date=transaction_date,
+                    running_balance=from_cents(balance),
+                )
+            )
+            if len(batch) == batch_size:
+                insert_batch(batch)
+                batch = []
+        insert_batch(batch)
+
+        # bulk_create bypasses save(), so bring the derived tables up to
+        # date once for the whole seed
+        if first_date is not None:
+            if had_rows:
+                Transaction.objects.rebuild_running_balances(since=first_date)
+            DailyExpenseCount.objects.rebuild()
+            BalanceSnapshot.objects.rebuild(since=first_date)
+            ledger_cache.invalidate_ledger(
+                refresh=Transaction.objects.latest_balance
+            )
+
+    return created_count
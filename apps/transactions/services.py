@@ -1,48 +1,100 @@
+from collections import Counter
+from itertools import islice
+from django.db import transaction as db_transaction
+from django.utils import timezone
 from django.utils.dateparse import parse_datetime
-from .models import Transaction
-from apps.core.api_client import TransactionAPIClient
+from .models import (
+    BalanceSnapshot,
+    DailyExpenseCount,
+    ImportJob,
+    ImportState,
+    Transaction,
+    lock_ledger,
+)
+from . import cache as ledger_cache
+from apps.core.api_client import (
+    AsyncTransactionAPIClient,
+    TransactionAPIClient,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+IMPORT_BATCH_SIZE = 500
+API_IMPORT_SOURCE = "transactions-api"
+
+
+def _chunked(iterable, size):
+    """Yield lists of up to `size` items from `iterable`"""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
 
 class TransactionService:
 
     @staticmethod
-    def import_transactions_from_api():
+    def import_transactions_from_api(
+        batch_size=IMPORT_BATCH_SIZE,
+        concurrent=False,
+        incremental=True,
+        progress=None,
+        api_client=None,
+    ):
         """
-        Import transactions from external API and save to database
+        Import transactions from external API and save to database.
+        With `concurrent`, upstream pages are fetched in parallel.
+        With `incremental`, records are requested newest first and the
+        stream stops at the stored high-water mark, so a repeated sync
+        only touches records created since the previous one.
+        `progress` is passed on to import_transactions().
+        `api_client` is a TransactionAPIClient the caller keeps to reuse
+        its pooled connections across imports, otherwise one is opened
+        and closed for this import. The concurrent fetcher does not use it.
         Returns tuple: (created_count, skipped_count)
         """
-        api_client = TransactionAPIClient()
+        own_client = None
+        if concurrent:
+            api_client = AsyncTransactionAPIClient()
+        elif api_client is None:
+            api_client = own_client = TransactionAPIClient()
 
         try:
-            # Fetch from API
-            api_transactions = api_client.fetch_transactions()
-
-            created_count = 0
-            skipped_count = 0
-
-            for transaction_data in api_transactions:
-                # Check if transaction already exists
-                if Transaction.objects.filter(
-                    transaction_code=transaction_data["id"]
-                ).exists():
-                    skipped_count += 1
-                    continue
+            with db_transaction.atomic():
+                (
+                    state,
+                    _,
+                ) = ImportState.objects.select_for_update().get_or_create(
+                    source=API_IMPORT_SOURCE
+                )
+
+                # Stream from API, persisting one batch at a time
+                if incremental:
+                    api_transactions = TransactionService._until_watermark(
+                        api_client.iter_transactions(order="desc"),
+                        state.last_created_at,
+                    )
+                else:
+                    api_transactions = api_client.iter_transactions()
 
-                # Create new transaction
-                transaction = Transaction(
-                    transaction_code=transaction_data["id"],
-                    amount=abs(transaction_data["amount"]),
-                    type=transaction_data["type"],
-                    transaction_date=parse_datetime(
-                        transaction_data["createdAt"]
-                    ),
+                newest = {}
+                created_count, skipped_count = (
+                    TransactionService.import_transactions(
+                        TransactionService._track_newest(
+                            api_transactions, newest
+                        ),
+                        batch_size=batch_size,
+                        progress=progress,
+                    )
                 )
 
-                transaction.save()
-                created_count += 1
+                if newest and (
+                    state.last_created_at is None
+                    or newest["created_at"] > state.last_created_at
+                ):
+                    state.last_created_at = newest["created_at"]
+                    state.last_transaction_code = newest["code"]
+                    state.save()
 
             logger.info(
                 f"Import complete: {created_count} created, "
@@ -53,3 +105,154 @@ class TransactionService:
         except Exception as e:
             logger.error(f"Transaction import failed: {e}")
             raise
+        finally:
+            if own_client is not None:
+                own_client.close()
+
+    @staticmethod
+    def _until_watermark(records, watermark):
+        """
+        Yield newest-first records until one older than `watermark`.
+        Records at the watermark itself are passed on, as several may share
+        a timestamp, and already stored ones are skipped by the importer
+        """
+        for transaction_data in records:
+            if (
+                watermark is not None
+                and parse_datetime(transaction_data["createdAt"]) < watermark
+            ):
+                return
+            yield transaction_data
+
+    @staticmethod
+    def _track_newest(records, newest):
+        """Pass records through, noting the newest one in `newest`"""
+        for transaction_data in records:
+            created_at = parse_datetime(transaction_data["createdAt"])
+            if not newest or created_at > newest["created_at"]:
+                newest["created_at"] = created_at
+                newest["code"] = transaction_data["id"]
+            yield transaction_data
+
+    @staticmethod
+    def import_transactions(
+        records, batch_size=IMPORT_BATCH_SIZE, progress=None
+    ):
+        """
+        Bulk insert API transaction records in one database transaction,
+        skipping codes that are already stored or repeated in `records`.
+        Each batch costs one IN lookup for existing codes, one bulk
+        INSERT and one counter UPDATE per day with expenses.
+        `progress(created_count, skipped_count)` is called after every
+        batch.
+        Returns tuple: (created_count, skipped_count)
+        """
+        created_count = 0
+        skipped_count = 0
+        earliest_date = None
+
+        with db_transaction.atomic():
+            lock_ledger()
+            for batch in _chunked(records, batch_size):
+                existing_codes = set(
+                    Transaction.objects.filter(
+                        transaction_code__in={data["id"] for data in batch}
+                    )
+                    .order_by()
+                    .values_list("transaction_code", flat=True)
+                )
+
+                new_transactions = {}
+                for transaction_data in batch:
+                    code = transaction_data["id"]
+                    if code in existing_codes or code in new_transactions:
+                        skipped_count += 1
+                        continue
+
+                    new_transactions[code] = Transaction(
+                        transaction_code=code,
+                        amount=abs(transaction_data["amount"]),
+                        type=transaction_data["type"],
+                        transaction_date=parse_datetime(
+                            transaction_data["createdAt"]
+                        ),
+                    )
+
+                if not new_transactions:
+                    if progress is not None:
+                        progress(created_count, skipped_count)
+                    continue
+
+                # Every row is inserted, so the counts and expense counters
+                # below hold: other ledger writers wait on the ledger lock,
+                # and a code stored by anything bypassing it fails the
+                # import as a whole
+                Transaction.objects.bulk_create(
+                    new_transactions.values(), batch_size=batch_size
+                )
+                created_count += len(new_transactions)
+
+                expense_days = Counter(
+                    tx.get_expense_day()
+                    for tx in new_transactions.values()
+                    if tx.type == "expense"
+                )
+                for day, count in expense_days.items():
+                    DailyExpenseCount.objects.increment(day, count)
+
+                batch_earliest = min(
+                    tx.transaction_date for tx in new_transactions.values()
+                )
+                if earliest_date is None or batch_earliest < earliest_date:
+                    earliest_date = batch_earliest
+
+                if progress is not None:
+                    progress(created_count, skipped_count)
+
+            # bulk_create bypasses save(), so bring the stored running
+            # balances, snapshots and cached ledger data up to date once
+            # per import
+            if earliest_date is not None:
+                Transaction.objects.rebuild_running_balances(
+                    since=earliest_date
+                )
+                BalanceSnapshot.objects.rebuild(since=earliest_date)
+                ledger_cache.invalidate_ledger(
+                    refresh=Transaction.objects.latest_balance
+                )
+
+        return created_count, skipped_count
+
+    @staticmethod
+    def run_import_job(job, api_client=None):
+        """
+        Run a claimed ImportJob, publishing progress while it runs and
+        recording the outcome on the job row. `api_client` is passed on
+        to import_transactions_from_api()
+        """
+
+        def progress(created_count, skipped_count):
+            ledger_cache.set_import_progress(
+                job.pk, created_count, skipped_count
+            )
+
+        try:
+            created_count, skipped_count = (
+                TransactionService.import_transactions_from_api(
+                    concurrent=job.concurrent,
+                    incremental=job.incremental,
+                    progress=progress,
+                    api_client=api_client,
+                )
+            )
+        except Exception as e:
+            job.status = ImportJob.STATUS_FAILED
+            job.error = str(e)
+        else:
+            job.status = ImportJob.STATUS_SUCCEEDED
+            job.created_count = created_count
+            job.skipped_count = skipped_count
+
+        job.finished_at = timezone.now()
+        job.save()
+        return job
@@ -0,0 +1,276 @@
+import json
+import warnings
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.utils import timezone
+from apps.transactions.models import Transaction
+
+
+class TransactionAPITest(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        for i in range(5):
+            Transaction.objects.create(
+                transaction_code=f"TXN-{i + 1:04d}",
+                amount=Decimal("10.00"),
+                type="deposit" if i % 2 == 0 else "expense",
+                transaction_date=self.now - timedelta(days=5 - i),
+            )
+
+    def _get_json(self, url, params=None):
+        response = self.client.get(url, params or {})
+        if isinstance(response, StreamingHttpResponse):
+            body = b"".join(response.streaming_content)
+        else:
+            body = response.content
+        return response, json.loads(body)
+
+    def _post_json(self, url, data):
+        return self.client.post(
+            url, json.dumps(data), content_type="application/json"
+        )
+
+    def test_list_streams_newest_first(self):
+        """Test the list is streamed, newest first, with balances"""
+        response, data = self._get_json("/api/transactions/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(
+            [row["transaction_code"] for row in data["results"]],
+            ["TXN-0005", "TXN-0004", "TXN-0003", "TXN-0002", "TXN-0001"],
+        )
+        self.assertEqual(data["results"][0]["running_balance"], "10.00")
+        self.assertIsNone(data["next_cursor"])
+
+    async def test_list_streams_under_asgi(self):
+        """Test the list is streamed lazily by the ASGI handler"""
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            response = await self.async_client.get(
+                "/api/transactions/", {"limit": 2}
+            )
+            body = b"".join(
+                [part async for part in response.streaming_content]
+            )
+
+        self.assertTrue(response.is_async)
+        self.assertEqual(caught, [])
+        data = json.loads(body)
+        self.assertEqual(
+            [row["transaction_code"] for row in data["results"]],
+            ["TXN-0005", "TXN-0004"],
+        )
+        self.assertIsNotNone(data["next_cursor"])
+
+    def test_list_cursor_pagination(self):
+        """Test following next_cursor walks every row exactly once"""
+        seen = []
+        params = {"limit": 2}
+        while True:
+            _, data = self._get_json("/api/transactions/", params)
+            seen.extend(row["transaction_code"] for row in data["results"])
+            if data["next_cursor"] is None:
+                break
+            params["cursor"] = data["next_cursor"]
+
+        self.assertEqual(
+            seen, ["TXN-0005", "TXN-0004", "TXN-0003", "TXN-0002", "TXN-0001"]
+        )
+
+    def test_list_filters(self):
+        """Test filtering by type and date range"""
+        _, data = self._get_json(
+            "/api/transactions/",
+            {
+                "type": "deposit",
+                "start": (self.now - timedelta(days=4)).isoformat(),
+                "end": (self.now - timedelta(days=1)).isoformat(),
+            },
+        )
+
+        self.assertEqual(
+            [row["transaction_code"] for row in data["results"]],
+            ["TXN-0005", "TXN-0003"],
+        )
+
+    def test_list_invalid_params(self):
+        """Test malformed query parameters are rejected"""
+        for params in (
+            {"type": "refund"},
+            {"start": "yesterday"},
+            {"cursor": "oops"},
+            {"cursor": "99999999999999999999_1"},
+            {"limit": "0"},
+            {"limit": "many"},
+        ):
+            response, data = self._get_json("/api/transactions/", params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("error", data)
+
+    def test_detail(self):
+        """Test a single transaction is returned, or a 404"""
+        transaction = Transaction.objects.get(transaction_code="TXN-0002")
+
+        response, data = self._get_json(
+            f"/api/transactions/{transaction.pk}/"
+        )
+        self.assertEqual(data["type"], "expense")
+        self.assertEqual(data["amount"], "10.00")
+
+        response, _ = self._get_json("/api/transactions/0/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_create(self):
+        """Test creating through the API applies the form checks"""
+        response = self._post_json(
+            "/api/transactions/", {"type": "deposit", "amount": "25.50"}
+        )
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data["transaction_code"], "TXN-0006")
+        self.assertEqual(data["running_balance"], "35.50")
+
+        response = self._post_json(
+            "/api/transactions/", {"type": "expense", "amount": "1000.00"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Not enough balance", json.dumps(response.json()))
+
+    def test_bulk_create(self):
+        """Test bulk create inserts every record with exact balances"""
+        response = self._post_json(
+            "/api/transactions/bulk/",
+            [
+                {"type": "deposit", "amount": "100.00"},
+                {
+                    "type": "expense",
+                    "amount": "5.00",
+                    "transaction_date": (
+                        self.now - timedelta(days=10)
+                    ).isoformat(),
+                },
+            ],
+        )
+
+        self.assertEqual(response.status_code, 201)
+        results = response.json()["results"]
+        self.assertEqual(
+            [(row["type"], row["running_balance"]) for row in results],
+            [("expense", "-5.00"), ("deposit", "105.00")],
+        )
+        self.assertEqual(Transaction.objects.count(), 7)
+        self.assertEqual(Transaction.get_current_balance(), Decimal("105.00"))
+
+    def test_bulk_create_invalid(self):
+        """Test one invalid record rejects the whole request"""
+        response = self._post_json(
+            "/api/transactions/bulk/",
+            [
+                {"type": "deposit", "amount": "100.00"},
+                {"type": "deposit", "amount": "-1"},
+            ],
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()["errors"]), ["1"])
+        self.assertEqual(Transaction.objects.count(), 5)
+
+        response = self.client.post(
+            "/api/transactions/bulk/", "{", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_writes_require_json_content_type(self):
+        """Test a cross-site style text/plain POST is refused"""
+        body = json.dumps({"type": "deposit", "amount": "25.50"})
+        for url in ("/api/transactions/", "/api/transactions/bulk/"):
+            with self.subTest(url):
+                response = self.client.post(
+                    url, body, content_type="text/plain"
+                )
+
+                self.assertEqual(response.status_code, 415)
+        self.assertEqual(Transaction.objects.count(), 5)
+
+
+class TransactionExportTest(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        for i, (amount, tx_type) in enumerate(
+            [("100.00", "deposit"), ("30.00", "expense"), ("5.50", "deposit")]
+        ):
+            Transaction.objects.create(
+                transaction_code=f"TXN-{i + 1:04d}",
+                amount=Decimal(amount),
+                type=tx_type,
+                transaction_date=self.now - timedelta(days=3 - i),
+            )
+
+    def test_export_csv(self):
+        """Test the CSV export streams every row with running balances"""
+        response = self.client.get("/export/csv/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            lines[0],
+            "transaction_code,transaction_date,type,amount,running_balance",
+        )
+        self.assertEqual(
+            [line.split(",")[-1] for line in lines[1:]],
+            ["100.00", "70.00", "75.50"],
+        )
+
+    def test_export_ndjson_range(self):
+        """Test a ranged export starts from the balance before the range"""
+        response = self.client.get(
+            "/export/ndjson/",
+            {"start": (self.now - timedelta(days=2)).isoformat()},
+        )
+
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [
+                (row["transaction_code"], row["running_balance"])
+                for row in rows
+            ],
+            [("TXN-0002", "70.00"), ("TXN-0003", "75.50")],
+        )
+
+    async def test_export_streams_under_asgi(self):
+        """Test the export is streamed lazily by the ASGI handler"""
+        response = await self.async_client.get("/export/ndjson/")
+
+        self.assertTrue(response.is_async)
+        lines = b"".join(
+            [part async for part in response.streaming_content]
+        ).splitlines()
+        self.assertEqual(json.loads(lines[-1])["running_balance"], "75.50")
+
+    def test_export_unknown_format(self):
+        """Test unsupported formats are rejected"""
+        response = self.client.get("/export/xml/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_transactions_command(self):
+        """Test the management command writes the same export"""
+        out = StringIO()
+
+        call_command("export_transactions", "--format=ndjson", stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[-1]["running_balance"], "75.50")
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from unittest.mock import patch
+from django.test import TestCase
+from django.utils import timezone
+from decimal import Decimal
+from apps.transactions import cache as ledger_cache
+from apps.transactions.models import Transaction
+
+
+class LedgerCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def _create(self, code, amount, tx_type):
+        return Transaction.objects.create(
+            transaction_code=code,
+            amount=Decimal(amount),
+            type=tx_type,
+            transaction_date=timezone.now(),
+        )
+
+    def test_balance_cached_after_first_read(self):
+        """Test a repeated balance read is served without queries"""
+        self._create("TXN-0001", "100.00", "deposit")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                Transaction.get_current_balance(), Decimal("100.00")
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                Transaction.get_current_balance(), Decimal("100.00")
+            )
+
+        self.assertEqual(
+            ledger_cache.get_balance_stats(), {"hits": 1, "misses": 1}
+        )
+
+    def test_balance_stats_cost_one_write_per_read(self):
+        """Test counting a cache hit takes one increment, not add + incr"""
+        self._create("TXN-0001", "100.00", "deposit")
+        Transaction.get_current_balance()
+        Transaction.get_current_balance()
+        backend = ledger_cache.get_cache()
+
+        with patch.object(backend, "add", wraps=backend.add) as add:
+            with patch.object(backend, "incr", wraps=backend.incr) as incr:
+                Transaction.get_current_balance()
+
+        add.assert_not_called()
+        incr.assert_called_once()
+        self.assertEqual(
+            ledger_cache.get_balance_stats(), {"hits": 2, "misses": 1}
+        )
+
+    def test_save_and_delete_invalidate_balance(self):
+        """Test writes bump the ledger version so reads are fresh"""
+        deposit = self._create("TXN-0001", "100.00", "deposit")
+        self.assertEqual(Transaction.get_current_balance(), Decimal("100.00"))
+
+        expense = self._create("TXN-0002", "40.00", "expense")
+        self.assertEqual(Transaction.get_current_balance(), Decimal("60.00"))
+
+        deposit.amount = Decimal("50.00")
+        deposit.save()
+        self.assertEqual(Transaction.get_current_balance(), Decimal("10.00"))
+
+        expense.delete()
+        self.assertEqual(Transaction.get_current_balance(), Decimal("50.00"))
+
+    def test_write_through_on_commit(self):
+        """Test the new balance is cached once the write commits"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create("TXN-0001", "75.00", "deposit")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                Transaction.get_current_balance(), Decimal("75.00")
+            )
+
+    def test_evicted_version_restarts_above_previous(self):
+        """Test losing the version counter never reuses an old version"""
+        version = ledger_cache.bump_ledger_version()
+        cache.delete(ledger_cache.VERSION_KEY)
+
+        self.assertGreater(ledger_cache.get_ledger_version(), version)
+
+    def test_rows_fragment_cached_until_ledger_changes(self):
+        """Test unchanged pages are served without queries or rendering"""
+        for i in range(12):
+            self._create(f"TXN-{i + 1:04d}", "10.00", "deposit")
+        cursor = self.client.get("/").context["next_cursor"]
+        url = f"/load-more-transactions/?cursor={cursor}"
+
+        first = self.client.get(url)
+        with self.assertNumQueries(0), self.assertTemplateNotUsed(
+            template_name="transactions/partials/transaction_rows.html"
+        ):
+            repeat = self.client.get(url)
+        self.assertEqual(repeat.content, first.content)
+
+        edited = Transaction.objects.get(transaction_code="TXN-0002")
+        edited.amount = Decimal("5.00")
+        edited.save()
+
+        self.assertContains(self.client.get(url), "+5.00")
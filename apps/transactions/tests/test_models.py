@@ -1,7 +1,27 @@
+import random
+from importlib import import_module
+from io import StringIO
+from unittest.mock import patch
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.db import connection, migrations
+from django.db.models import QuerySet
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from datetime import timedelta
 from decimal import Decimal
-from apps.transactions.models import Transaction
+from apps.transactions.models import (
+    BalanceSnapshot,
+    DailyExpenseCount,
+    DailyExpenseLimitReached,
+    Transaction,
+    format_cents,
+    from_cents,
+    to_cents,
+)
+from apps.transactions.seeding import seed_transactions
+from apps.transactions.services import TransactionService
 
 
 class TransactionModelTest(TestCase):
@@ -55,6 +75,41 @@ class TransactionModelTest(TestCase):
         transaction = Transaction.objects.create(**self.expense_data)
         self.assertEqual(transaction.get_signed_amount(), Decimal("-50.00"))
 
+    def test_signed_cents_follow_every_write(self):
+        """Test the database keeps signed cents, bulk writes included"""
+        deposit = Transaction.objects.create(**self.deposit_data)
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    transaction_code="TXN-0003",
+                    amount=Decimal("0.29"),
+                    type="expense",
+                    transaction_date=timezone.now(),
+                )
+            ]
+        )
+        Transaction.objects.filter(pk=deposit.pk).update(
+            amount=Decimal("12.34")
+        )
+
+        self.assertEqual(
+            dict(
+                Transaction.objects.values_list(
+                    "transaction_code", "signed_cents"
+                )
+            ),
+            {"TXN-0001": 1234, "TXN-0003": -29},
+        )
+        self.assertEqual(Transaction.objects.balance(), Decimal("12.05"))
+
+    def test_cents_conversions(self):
+        """Test cents round-trip through the Decimal-facing API"""
+        self.assertEqual(from_cents(-1205), Decimal("-12.05"))
+        self.assertEqual(str(from_cents(0)), "0.00")
+        self.assertEqual(to_cents(Decimal("-12.05")), -1205)
+        self.assertEqual(format_cents(-1205), "-12.05")
+        self.assertEqual(format_cents(7), "0.07")
+
     def test_get_current_balance(self):
         """Test get_current_balance class method"""
         # Create some transactions
@@ -77,3 +132,666 @@ class TransactionModelTest(TestCase):
         # Try to create another transaction with same code
         with self.assertRaises(Exception):
             Transaction.objects.create(**self.deposit_data)
+
+
+class TransactionRunningBalanceTest(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def _create(self, code, amount, tx_type, days_ago=0):
+        return Transaction.objects.create(
+            transaction_code=code,
+            amount=Decimal(amount),
+            type=tx_type,
+            transaction_date=self.now - timedelta(days=days_ago),
+        )
+
+    def _balances(self):
+        return list(
+            Transaction.objects.chronological().values_list(
+                "transaction_code", "running_balance"
+            )
+        )
+
+    def test_running_balance_accumulates_on_insert(self):
+        """Test each new row stores its predecessor's balance plus amount"""
+        self._create("TXN-0001", "100.00", "deposit", days_ago=2)
+        self._create("TXN-0002", "30.00", "expense", days_ago=1)
+
+        self.assertEqual(
+            self._balances(),
+            [("TXN-0001", Decimal("100.00")), ("TXN-0002", Decimal("70.00"))],
+        )
+        self.assertEqual(
+            Transaction.objects.latest_balance(), Decimal("70.00")
+        )
+
+    def test_backdated_insert_shifts_later_rows(self):
+        """Test inserting in the past updates every later balance"""
+        self._create("TXN-0001", "100.00", "deposit", days_ago=3)
+        self._create("TXN-0002", "30.00", "expense", days_ago=1)
+        self._create("TXN-0003", "50.00", "deposit", days_ago=2)
+
+        self.assertEqual(
+            self._balances(),
+            [
+                ("TXN-0001", Decimal("100.00")),
+                ("TXN-0003", Decimal("150.00")),
+                ("TXN-0002", Decimal("120.00")),
+            ],
+        )
+
+    def test_edit_applies_delta_to_later_rows(self):
+        """Test editing amount and type re-balances the following rows"""
+        first = self._create("TXN-0001", "100.00", "deposit", days_ago=2)
+        self._create("TXN-0002", "30.00", "expense", days_ago=1)
+
+        first.amount = Decimal("10.00")
+        first.type = "expense"
+        first.save()
+
+        self.assertEqual(
+            self._balances(),
+            [("TXN-0001", Decimal("-10.00")), ("TXN-0002", Decimal("-40.00"))],
+        )
+
+    def test_edit_touches_only_later_rows(self):
+        """Test an edit is one UPDATE of later rows, earlier rows untouched"""
+        self._create("TXN-0001", "100.00", "deposit", days_ago=3)
+        edited = self._create("TXN-0002", "30.00", "expense", days_ago=2)
+        self._create("TXN-0003", "5.00", "expense", days_ago=1)
+        # A wrong earlier balance would be fixed by any full recompute
+        Transaction.objects.filter(transaction_code="TXN-0001").update(
+            running_balance=Decimal("999.00")
+        )
+
+        edited.amount = Decimal("20.00")
+        with CaptureQueriesContext(connection) as queries:
+            edited.save()
+
+        ledger_updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "transactions_transaction"')
+        ]
+        # The edited row itself plus one shift of every later row
+        self.assertEqual(len(ledger_updates), 2)
+        self.assertEqual(
+            self._balances(),
+            [
+                ("TXN-0001", Decimal("999.00")),
+                ("TXN-0002", Decimal("80.00")),
+                ("TXN-0003", Decimal("75.00")),
+            ],
+        )
+
+    def test_move_later_past_no_row(self):
+        """Test a row moved later, still before the next row, rebalances"""
+        self._create("TXN-0001", "10.00", "deposit", days_ago=3)
+        moved = self._create("TXN-0002", "5.00", "deposit", days_ago=2)
+        self._create("TXN-0003", "1.00", "deposit", days_ago=1)
+
+        moved.transaction_date = self.now - timedelta(days=1.5)
+        moved.save()
+
+        moved.refresh_from_db()
+        self.assertEqual(moved.running_balance, Decimal("15.00"))
+        self.assertEqual(
+            self._balances(),
+            [
+                ("TXN-0001", Decimal("10.00")),
+                ("TXN-0002", Decimal("15.00")),
+                ("TXN-0003", Decimal("16.00")),
+            ],
+        )
+        self.assertEqual(Transaction.objects.rebuild_running_balances(), 0)
+
+    def test_move_later_past_other_rows(self):
+        """Test a row moved past later rows takes the last one's balance"""
+        moved = self._create("TXN-0001", "10.00", "deposit", days_ago=3)
+        self._create("TXN-0002", "5.00", "deposit", days_ago=2)
+        self._create("TXN-0003", "1.00", "expense", days_ago=1)
+
+        moved.transaction_date = self.now
+        moved.save()
+
+        self.assertEqual(
+            self._balances(),
+            [
+                ("TXN-0002", Decimal("5.00")),
+                ("TXN-0003", Decimal("4.00")),
+                ("TXN-0001", Decimal("14.00")),
+            ],
+        )
+
+    def test_out_of_order_writes_match_rebuild(self):
+        """Test random inserts, edits and deletes keep balances exact"""
+        rng = random.Random(7)
+        rows = []
+        for i in range(40):
+            rows.append(
+                self._create(
+                    f"TXN-{i:04d}",
+                    f"{rng.randint(1, 9999) / 100:.2f}",
+                    rng.choice(["deposit", "expense"]),
+                    days_ago=rng.randint(0, 10),
+                )
+            )
+        for transaction in rng.sample(rows, 15):
+            transaction.amount = Decimal(rng.randint(1, 9999)) / 100
+            if rng.random() < 0.5:
+                transaction.type = rng.choice(["deposit", "expense"])
+            else:
+                transaction.transaction_date = self.now - timedelta(
+                    days=rng.randint(0, 10), hours=rng.randint(0, 23)
+                )
+            transaction.save()
+        for transaction in rng.sample(rows, 10):
+            transaction.delete()
+
+        # Nothing is left for a full recompute to fix
+        self.assertEqual(Transaction.objects.rebuild_running_balances(), 0)
+        self.assertEqual(
+            Transaction.objects.latest_balance(),
+            Transaction.objects.balance(),
+        )
+
+    def test_delete_removes_contribution_from_later_rows(self):
+        """Test deleting a row re-balances the following rows"""
+        first = self._create("TXN-0001", "100.00", "deposit", days_ago=2)
+        self._create("TXN-0002", "30.00", "expense", days_ago=1)
+
+        first.delete()
+
+        self.assertEqual(self._balances(), [("TXN-0002", Decimal("-30.00"))])
+
+    def test_queryset_delete_rebuilds_balances(self):
+        """Test bulk deletes keep stored balances consistent"""
+        self._create("TXN-0001", "100.00", "deposit", days_ago=3)
+        self._create("TXN-0002", "30.00", "deposit", days_ago=2)
+        self._create("TXN-0003", "20.00", "expense", days_ago=1)
+
+        Transaction.objects.filter(transaction_code="TXN-0002").delete()
+
+        self.assertEqual(
+            self._balances(),
+            [("TXN-0001", Decimal("100.00")), ("TXN-0003", Decimal("80.00"))],
+        )
+
+    def test_rebuild_running_balances(self):
+        """Test rebuild repairs balances written without save()"""
+        self._create("TXN-0001", "100.00", "deposit", days_ago=2)
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    transaction_code="TXN-0002",
+                    amount=Decimal("25.00"),
+                    type="expense",
+                    transaction_date=self.now,
+                )
+            ]
+        )
+
+        updated = Transaction.objects.rebuild_running_balances(
+            since=self.now, batch_size=1
+        )
+
+        self.assertEqual(updated, 1)
+        self.assertEqual(
+            self._balances(),
+            [("TXN-0001", Decimal("100.00")), ("TXN-0002", Decimal("75.00"))],
+        )
+
+    def test_migration_backfills_running_balances(self):
+        """Test migration 0004 streams the ledger to fill its balances"""
+        migration = import_module(
+            "apps.transactions.migrations.0004_transaction_running_balance"
+        )
+        self._create("TXN-0001", "100.00", "deposit", days_ago=2)
+        self._create("TXN-0002", "25.00", "expense", days_ago=1)
+        self._create("TXN-0003", "5.00", "deposit")
+        expected = self._balances()
+        Transaction.objects.update(running_balance=0)
+
+        with patch.object(
+            QuerySet, "iterator", autospec=True, side_effect=QuerySet.iterator
+        ) as iterator:
+            migration.backfill_running_balances(django_apps, None)
+
+        self.assertEqual(self._balances(), expected)
+        iterator.assert_called_once()
+        self.assertEqual(iterator.call_args.kwargs, {"chunk_size": 1000})
+
+    def test_queryset_balance_aggregate(self):
+        """Test balance() sums signed amounts in a single query"""
+        self._create("TXN-0001", "100.00", "deposit", days_ago=3)
+        self._create("TXN-0002", "30.00", "expense", days_ago=2)
+        self._create("TXN-0003", "5.50", "expense", days_ago=1)
+
+        with self.assertNumQueries(1):
+            total = Transaction.objects.balance()
+        self.assertEqual(total, Decimal("64.50"))
+
+        recent = Transaction.objects.between(
+            start=self.now - timedelta(days=2)
+        )
+        self.assertEqual(recent.balance(), Decimal("-35.50"))
+        self.assertEqual(
+            Transaction.objects.filter(type="deposit").balance(),
+            Decimal("100.00"),
+        )
+
+    def test_queryset_balance_empty(self):
+        """Test balance() of an empty queryset is zero"""
+        self.assertEqual(Transaction.objects.balance(), Decimal("0"))
+
+    def test_window_balance_matches_stored(self):
+        """Test the SQL window balance equals the maintained balances"""
+        rng = random.Random(11)
+        for i in range(60):
+            self._create(
+                f"TXN-{i:04d}",
+                f"{rng.randint(1, 9999) / 100:.2f}",
+                rng.choice(["deposit", "expense"]),
+                days_ago=rng.randint(0, 10),
+            )
+        # Rows written without save() are only fixed by the Python rebuild
+        Transaction.objects.filter(transaction_code="TXN-0000").update(
+            amount=Decimal("12.34")
+        )
+        Transaction.objects.rebuild_running_balances()
+
+        rows = Transaction.objects.chronological().with_window_balance()
+        self.assertEqual(
+            [tx.window_balance for tx in rows],
+            [tx.running_balance for tx in rows],
+        )
+
+        # A keyset page reads only its own rows, balances still exact
+        middle = Transaction.objects.newest_first()[25]
+        with self.assertNumQueries(1):
+            page = list(
+                Transaction.objects.newest_first()
+                .before(middle.transaction_date, middle.pk)
+                .with_window_balance()[:10]
+            )
+        self.assertEqual(len(page), 10)
+        for tx in page:
+            self.assertEqual(tx.window_balance, tx.running_balance)
+
+
+class LedgerLockTest(TestCase):
+
+    def setUp(self):
+        self.transaction = Transaction.objects.create(
+            transaction_code="TXN-0001",
+            amount=Decimal("100.00"),
+            type="deposit",
+            transaction_date=timezone.now() - timedelta(days=1),
+        )
+
+    def _assert_locks_before_reading(self, write):
+        with CaptureQueriesContext(connection) as queries:
+            write()
+
+        statements = [query["sql"] for query in queries.captured_queries]
+        lock = next(
+            i
+            for i, sql in enumerate(statements)
+            if sql.startswith('UPDATE "transactions_codesequence"')
+            and "'ledger'" in sql
+        )
+        first_ledger_query = next(
+            i
+            for i, sql in enumerate(statements)
+            if '"transactions_transaction"' in sql
+            or '"transactions_balancesnapshot"' in sql
+        )
+        self.assertLess(lock, first_ledger_query)
+
+    def test_write_paths_take_ledger_lock(self):
+        """Test every ledger write locks the ledger before reading it"""
+
+        def edit():
+            self.transaction.amount = Decimal("50.00")
+            self.transaction.save()
+
+        expense = Transaction(
+            transaction_code="TXN-0002",
+            amount=Decimal("5.00"),
+            type="expense",
+            transaction_date=timezone.now(),
+        )
+
+        record = {
+            "id": "API-001",
+            "amount": 10,
+            "type": "deposit",
+            "createdAt": "2025-07-20T10:00:00Z",
+        }
+        writes = {
+            "create": expense.save,
+            "edit": edit,
+            "delete": expense.delete,
+            "queryset delete": lambda: Transaction.objects.filter(
+                transaction_code="TXN-0001"
+            ).delete(),
+            "import": lambda: TransactionService.import_transactions([record]),
+            "seed": lambda: seed_transactions(3, seed=1),
+        }
+        for name, write in writes.items():
+            with self.subTest(name):
+                self._assert_locks_before_reading(write)
+
+    def test_snapshot_rebuild_takes_ledger_lock(self):
+        """Test snapshot rebuilds lock the ledger before reading it"""
+        since = timezone.now() - timedelta(days=1)
+        for name, write in {
+            "rebuild": BalanceSnapshot.objects.rebuild,
+            "rebuild since": lambda: BalanceSnapshot.objects.rebuild(since),
+            "command": lambda: call_command(
+                "rebuild_snapshots", stdout=StringIO()
+            ),
+        }.items():
+            with self.subTest(name):
+                self._assert_locks_before_reading(write)
+
+
+class DailyExpenseCountTest(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.today = timezone.localdate(self.now)
+
+    def _create(self, code, tx_type="expense", days_ago=0, **kwargs):
+        transaction = Transaction(
+            transaction_code=code,
+            amount=Decimal("1.00"),
+            type=tx_type,
+            transaction_date=self.now - timedelta(days=days_ago),
+        )
+        transaction.save(**kwargs)
+        return transaction
+
+    def test_counts_follow_writes(self):
+        """Test creating, editing and deleting keep the counters right"""
+        first = self._create("EXP001")
+        self._create("EXP002")
+        self._create("DEP001", tx_type="deposit")
+        self.assertEqual(DailyExpenseCount.objects.get_count(self.today), 2)
+
+        yesterday = self.today - timedelta(days=1)
+        first.transaction_date -= timedelta(days=1)
+        first.save()
+        self.assertEqual(DailyExpenseCount.objects.get_count(self.today), 1)
+        self.assertEqual(DailyExpenseCount.objects.get_count(yesterday), 1)
+
+        first.type = "deposit"
+        first.save()
+        self.assertEqual(DailyExpenseCount.objects.get_count(yesterday), 0)
+
+        Transaction.objects.get(transaction_code="EXP002").delete()
+        self.assertEqual(DailyExpenseCount.objects.get_count(self.today), 0)
+
+    def test_queryset_delete_updates_counts(self):
+        """Test bulk deletes subtract per day"""
+        for i in range(3):
+            self._create(f"EXP00{i}", days_ago=i % 2)
+
+        Transaction.objects.filter(type="expense").delete()
+
+        self.assertEqual(DailyExpenseCount.objects.get_count(self.today), 0)
+        self.assertEqual(
+            DailyExpenseCount.objects.get_count(
+                self.today - timedelta(days=1)
+            ),
+            0,
+        )
+
+    def test_expense_limit_enforced_on_save(self):
+        """Test saving past the limit is refused without side effects"""
+        self._create("EXP001", expense_limit=2)
+        self._create("EXP002", expense_limit=2)
+
+        with self.assertRaises(DailyExpenseLimitReached):
+            self._create("EXP003", expense_limit=2)
+
+        self.assertFalse(
+            Transaction.objects.filter(transaction_code="EXP003").exists()
+        )
+        self.assertEqual(DailyExpenseCount.objects.get_count(self.today), 2)
+        # Deposits and other days are not limited
+        self._create("DEP001", tx_type="deposit", expense_limit=2)
+        self._create("EXP004", days_ago=1, expense_limit=2)
+
+    def test_rebuild(self):
+        """Test counters can be recomputed from the transactions"""
+        self._create("EXP001")
+        self._create("EXP002", days_ago=1)
+        DailyExpenseCount.objects.update(count=50)
+
+        DailyExpenseCount.objects.rebuild()
+
+        self.assertEqual(DailyExpenseCount.objects.get_count(self.today), 1)
+        self.assertEqual(
+            DailyExpenseCount.objects.get_count(
+                self.today - timedelta(days=1)
+            ),
+            1,
+        )
+
+
+class BalanceSnapshotTest(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def _create(self, code, amount, tx_type, days_ago=0):
+        return Transaction.objects.create(
+            transaction_code=code,
+            amount=Decimal(amount),
+            type=tx_type,
+            transaction_date=self.now - timedelta(days=days_ago),
+        )
+
+    def _snapshots(self):
+        return list(
+            BalanceSnapshot.objects.values_list(
+                "period",
+                "start",
+                "opening_balance",
+                "deposits",
+                "expenses",
+                "closing_balance",
+                "count",
+            )
+        )
+
+    def test_snapshots_follow_writes(self):
+        """Test incremental maintenance matches a full rebuild"""
+        self._create("TXN001", "100.00", "deposit", days_ago=40)
+        self._create("TXN002", "30.00", "expense", days_ago=2)
+        moved = self._create("TXN003", "20.00", "deposit")
+        # Backdated insert into an earlier month
+        self._create("TXN004", "5.00", "expense", days_ago=45)
+        moved.transaction_date -= timedelta(days=38)
+        moved.amount = Decimal("25.00")
+        moved.save()
+        Transaction.objects.get(transaction_code="TXN002").delete()
+
+        incremental = self._snapshots()
+        BalanceSnapshot.objects.rebuild()
+        self.assertEqual(incremental, self._snapshots())
+
+        days = BalanceSnapshot.objects.filter(
+            period=BalanceSnapshot.PERIOD_DAY
+        )
+        self.assertEqual(days.count(), 3)
+        self.assertEqual(days.last().closing_balance, Decimal("120.00"))
+
+    def test_first_write_to_period_created_in_parallel(self):
+        """Test a period snapshot created by another writer is added to"""
+        self._create("TXN001", "100.00", "deposit", days_ago=40)
+        get_closing_before = BalanceSnapshot.objects._get_closing_before
+
+        def create_in_parallel(period, start):
+            # Another writer stores the first row of the period between
+            # the failed UPDATE and our INSERT
+            opening = get_closing_before(period, start)
+            BalanceSnapshot.objects.create(
+                period=period,
+                start=start,
+                opening_balance=opening,
+                deposits=Decimal("10.00"),
+                count=1,
+                closing_balance=opening + Decimal("10.00"),
+            )
+            return opening
+
+        with patch.object(
+            BalanceSnapshot.objects,
+            "_get_closing_before",
+            side_effect=create_in_parallel,
+        ):
+            self._create("TXN002", "30.00", "expense")
+
+        day = BalanceSnapshot.objects.get(
+            period=BalanceSnapshot.PERIOD_DAY,
+            start=timezone.localdate(self.now),
+        )
+        self.assertEqual(day.count, 2)
+        self.assertEqual(day.expenses, Decimal("30.00"))
+        self.assertEqual(day.closing_balance, Decimal("80.00"))
+
+    def test_queryset_delete_rebuilds_snapshots(self):
+        """Test bulk deletes leave no stale periods behind"""
+        self._create("TXN001", "100.00", "deposit", days_ago=40)
+        self._create("TXN002", "30.00", "expense")
+
+        Transaction.objects.filter(type="expense").delete()
+
+        month = BalanceSnapshot.objects.filter(
+            period=BalanceSnapshot.PERIOD_MONTH
+        ).last()
+        self.assertEqual(month.closing_balance, Decimal("100.00"))
+        self.assertFalse(
+            BalanceSnapshot.objects.filter(
+                start=timezone.localdate(self.now),
+                period=BalanceSnapshot.PERIOD_DAY,
+            ).exists()
+        )
+
+    def test_rebuild_since_keeps_earlier_periods(self):
+        """Test a partial rebuild continues from the earlier snapshots"""
+        self._create("TXN001", "100.00", "deposit", days_ago=40)
+        self._create("TXN002", "30.00", "expense")
+        expected = self._snapshots()
+        BalanceSnapshot.objects.filter(
+            start__gte=timezone.localdate(self.now) - timedelta(days=1)
+        ).update(closing_balance=0)
+
+        BalanceSnapshot.objects.rebuild(since=self.now - timedelta(days=1))
+
+        self.assertEqual(self._snapshots(), expected)
+
+    def test_balance_at(self):
+        """Test point-in-time balances match summing the ledger"""
+        self._create("TXN001", "100.00", "deposit", days_ago=40)
+        self._create("TXN002", "30.00", "expense", days_ago=3)
+        self._create("TXN003", "20.00", "deposit", days_ago=1)
+        self._create("TXN004", "5.00", "expense")
+
+        for days_ago in (41, 40, 10, 3, 2, 1, 0):
+            when = self.now - timedelta(days=days_ago)
+            with self.assertNumQueries(2):
+                balance = BalanceSnapshot.objects.balance_at(when)
+            self.assertEqual(
+                balance,
+                Transaction.objects.filter(
+                    transaction_date__lte=when
+                ).balance(),
+            )
+
+    def test_rebuild_snapshots_command(self):
+        """Test the management command recomputes every snapshot"""
+        self._create("TXN001", "100.00", "deposit")
+        expected = self._snapshots()
+        BalanceSnapshot.objects.all().delete()
+        out = StringIO()
+
+        call_command("rebuild_snapshots", stdout=out)
+
+        self.assertIn("Rebuilt 2 balance snapshots", out.getvalue())
+        self.assertEqual(self._snapshots(), expected)
+
+    def test_migration_backfills_snapshots(self):
+        """Test migration 0010 fills snapshots for an existing ledger"""
+        migration = import_module(
+            "apps.transactions.migrations.0010_balancesnapshot"
+        )
+        self.assertIn(
+            migration.backfill_balance_snapshots,
+            [
+                operation.code
+                for operation in migration.Migration.operations
+                if isinstance(operation, migrations.RunPython)
+            ],
+        )
+
+        self._create("TXN001", "100.00", "deposit", days_ago=1)
+        self._create("TXN002", "30.00", "expense")
+        expected = self._snapshots()
+        BalanceSnapshot.objects.all().delete()
+
+        migration.backfill_balance_snapshots(django_apps, None)
+
+        self.assertEqual(self._snapshots(), expected)
+        self.assertEqual(
+            BalanceSnapshot.objects.balance_at(self.now), Decimal("70.00")
+        )
+
+
+class TransactionCodeAllocatorTest(TestCase):
+
+    def test_allocate_codes_sequential(self):
+        """Test codes are handed out in order, blocks included"""
+        self.assertEqual(Transaction.allocate_codes(), ["TXN-0001"])
+        self.assertEqual(
+            Transaction.allocate_codes(3), ["TXN-0002", "TXN-0003", "TXN-0004"]
+        )
+
+    def test_allocate_codes_skips_existing(self):
+        """Test codes written without the allocator are never reissued"""
+        for number in (1, 2, 7):
+            Transaction.objects.create(
+                transaction_code=f"TXN-{number:04d}",
+                amount=Decimal("1.00"),
+                type="deposit",
+                transaction_date=timezone.now(),
+            )
+
+        self.assertEqual(Transaction.allocate_codes(), ["TXN-0008"])
+
+    def test_allocate_codes_after_delete(self):
+        """Test deleting rows does not make the next code collide"""
+        codes = Transaction.allocate_codes(2)
+        for code in codes:
+            Transaction.objects.create(
+                transaction_code=code,
+                amount=Decimal("1.00"),
+                type="deposit",
+                transaction_date=timezone.now(),
+            )
+        Transaction.objects.get(transaction_code=codes[0]).delete()
+
+        self.assertEqual(Transaction.allocate_codes(), ["TXN-0003"])
+
+    def test_allocate_codes_constant_queries(self):
+        """Test allocation cost does not depend on the table size"""
+        Transaction.allocate_codes()
+
+        # Counter UPDATE and read inside a savepoint, then the collision
+        # check
+        with self.assertNumQueries(5):
+            Transaction.allocate_codes()
@@ -0,0 +1,124 @@
+from io import StringIO
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from apps.transactions.models import (
+    BalanceSnapshot,
+    DailyExpenseCount,
+    Transaction,
+)
+from apps.transactions.seeding import SEED_END, seed_transactions
+
+
+class SeedTransactionsTest(TestCase):
+
+    def _ledger(self):
+        return list(
+            Transaction.objects.chronological().values_list(
+                "transaction_code",
+                "amount",
+                "type",
+                "running_balance",
+                "transaction_date",
+            )
+        )
+
+    def test_seed_is_reproducible(self):
+        """Test the same seed yields the same ledger"""
+        seed_transactions(50, seed=3, batch_size=20)
+        first = self._ledger()
+        Transaction.objects.all().delete()
+
+        seed_transactions(50, seed=3, batch_size=20)
+
+        self.assertEqual(len(first), 50)
+        self.assertEqual(self._ledger(), first)
+
+    def test_seed_does_not_depend_on_clock(self):
+        """Test seeded dates end at the fixed end date, not at now"""
+        seed_transactions(20, seed=3, days=10)
+        first = self._ledger()
+        Transaction.objects.all().delete()
+
+        with patch(
+            "django.utils.timezone.now",
+            return_value=timezone.now() + timedelta(days=30),
+        ):
+            seed_transactions(20, seed=3, days=10)
+
+        self.assertEqual(self._ledger(), first)
+        self.assertLessEqual(first[-1][-1], SEED_END)
+        self.assertGreaterEqual(first[0][-1], SEED_END - timedelta(days=10))
+
+    def test_reseed_skips_stored_rows(self):
+        """Test seeding again with the same seed only adds missing rows"""
+        seed_transactions(20, seed=3, batch_size=8)
+
+        created_count = seed_transactions(30, seed=3, batch_size=8)
+
+        self.assertEqual(created_count, 10)
+        self.assertEqual(Transaction.objects.count(), 30)
+        self.assertEqual(Transaction.objects.rebuild_running_balances(), 0)
+        self.assertEqual(
+            Transaction.get_current_balance(), Transaction.objects.balance()
+        )
+
+    def test_seed_keeps_derived_data_consistent(self):
+        """Test balances, snapshots and counters need no repair"""
+        Transaction.objects.create(
+            transaction_code="TXN-0001",
+            amount=Decimal("500.00"),
+            type="deposit",
+            transaction_date=timezone.now(),
+        )
+
+        seed_transactions(30, seed=1, days=10)
+
+        self.assertEqual(Transaction.objects.rebuild_running_balances(), 0)
+        self.assertEqual(
+            Transaction.get_current_balance(), Transaction.objects.balance()
+        )
+        self.assertEqual(
+            sum(DailyExpenseCount.objects.values_list("count", flat=True)),
+            Transaction.objects.filter(type="expense").count(),
+        )
+        month = BalanceSnapshot.objects.filter(
+            period=BalanceSnapshot.PERIOD_MONTH
+        ).last()
+        self.assertEqual(month.closing_balance, Transaction.objects.balance())
+
+    def test_seed_transactions_command(self):
+        """Test the command can replace the ledger with seeded rows"""
+        seed_transactions(5, seed=9)
+
+        call_command(
+            "seed_transactions", rows=20, clear=True, stdout=StringIO()
+        )
+
+        self.assertEqual(Transaction.objects.count(), 20)
+        self.assertFalse(
+            Transaction.objects.filter(
+                transaction_code__startswith="S9-"
+            ).exists()
+        )
+
+    def test_seed_transactions_command_end(self):
+        """Test the command ends the ledger at --end"""
+        end = datetime(2024, 6, 1, 12, tzinfo=dt_timezone.utc)
+        out = StringIO()
+
+        call_command(
+            "seed_transactions",
+            rows=10,
+            days=5,
+            end=end.isoformat(),
+            stdout=out,
+        )
+
+        dates = Transaction.objects.values_list("transaction_date", flat=True)
+        self.assertLessEqual(max(dates), end)
+        self.assertGreaterEqual(min(dates), end - timedelta(days=5))
+        self.assertIn("Seeded 10 transactions", out.getvalue())
@@ -1,7 +1,15 @@
+from django.db import IntegrityError
 from django.test import TestCase
+from decimal import Decimal
 from unittest.mock import patch, MagicMock
 from apps.transactions.services import TransactionService
-from apps.transactions.models import Transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from apps.transactions.models import (
+    DailyExpenseCount,
+    ImportState,
+    Transaction,
+)
 
 
 class TransactionServiceTest(TestCase):
@@ -12,7 +20,7 @@ class TransactionServiceTest(TestCase):
         # Mock API response
         mock_client_instance = MagicMock()
         mock_api_client.return_value = mock_client_instance
-        mock_client_instance.fetch_transactions.return_value = [
+        mock_client_instance.iter_transactions.return_value = [
             {
                 "id": "API-001",
                 "amount": 100.50,
@@ -59,7 +67,7 @@ class TransactionServiceTest(TestCase):
         # Mock API response with same transaction
         mock_client_instance = MagicMock()
         mock_api_client.return_value = mock_client_instance
-        mock_client_instance.fetch_transactions.return_value = [
+        mock_client_instance.iter_transactions.return_value = [
             {
                 "id": "API-001",  # Same ID as existing
                 "amount": 100.50,
@@ -81,9 +89,242 @@ class TransactionServiceTest(TestCase):
         """Test handling of API errors"""
         mock_client_instance = MagicMock()
         mock_api_client.return_value = mock_client_instance
-        mock_client_instance.fetch_transactions.side_effect = Exception(
+        mock_client_instance.iter_transactions.side_effect = Exception(
             "API Error"
         )
 
         with self.assertRaises(Exception):
             TransactionService.import_transactions_from_api()
+        mock_client_instance.close.assert_called_once_with()
+
+    def test_import_transactions_keeps_caller_client_open(self):
+        """Test a client passed in is used and left open for reuse"""
+        api_client = MagicMock()
+        api_client.iter_transactions.return_value = []
+
+        TransactionService.import_transactions_from_api(api_client=api_client)
+
+        api_client.iter_transactions.assert_called_once_with(order="desc")
+        api_client.close.assert_not_called()
+
+    def test_import_transactions_bulk_batches(self):
+        """Test bulk import uses a constant number of queries per batch"""
+        records = [
+            {
+                "id": f"API-{i:03d}",
+                "amount": 10,
+                "type": "deposit",
+                "createdAt": f"2025-07-20T10:{i:02d}:00Z",
+            }
+            for i in range(10)
+        ]
+        # Repeated and already stored codes are skipped
+        records.append(dict(records[0]))
+        Transaction.objects.create(
+            transaction_code="API-009",
+            amount=10,
+            type="deposit",
+            transaction_date="2025-07-20T10:09:00Z",
+        )
+
+        # The ledger lock, one existence lookup and one bulk insert per
+        # batch of 4, plus savepoint handling, the running balance rebuild
+        # and the snapshot rebuild, which takes the lock again and runs
+        # four queries per snapshot period
+        with self.assertNumQueries(1 + 3 * 2 + 6 + 2 + 1 + 2 * 4):
+            created_count, skipped_count = (
+                TransactionService.import_transactions(records, batch_size=4)
+            )
+
+        self.assertEqual(created_count, 9)
+        self.assertEqual(skipped_count, 2)
+        self.assertEqual(Transaction.objects.count(), 10)
+
+    def test_import_transactions_conflict_fails_import(self):
+        """Test a code stored by another writer mid-import fails it"""
+        records = [
+            {
+                "id": f"API-{i:03d}",
+                "amount": 10,
+                "type": "expense",
+                "createdAt": f"2025-07-20T10:{i:02d}:00Z",
+            }
+            for i in range(3)
+        ]
+        bulk_create = Transaction.objects.bulk_create
+
+        def store_in_parallel(objs, *args, **kwargs):
+            # Another writer stores one of the codes after the lookup
+            Transaction.objects.create(
+                transaction_code="API-001",
+                amount=10,
+                type="deposit",
+                transaction_date="2025-07-20T10:01:00Z",
+            )
+            return bulk_create(objs, *args, **kwargs)
+
+        with patch.object(
+            Transaction.objects, "bulk_create", side_effect=store_in_parallel
+        ):
+            with self.assertRaises(IntegrityError):
+                TransactionService.import_transactions(records)
+
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(DailyExpenseCount.objects.exists())
+
+    def test_import_transactions_backdated_running_balances(self):
+        """Test imported rows older than stored ones re-balance the ledger"""
+        Transaction.objects.create(
+            transaction_code="TXN-0001",
+            amount=Decimal("100.00"),
+            type="deposit",
+            transaction_date="2025-07-21T10:00:00Z",
+        )
+
+        TransactionService.import_transactions(
+            [
+                {
+                    "id": "API-001",
+                    "amount": 40,
+                    "type": "deposit",
+                    "createdAt": "2025-07-20T10:00:00Z",
+                },
+                {
+                    "id": "API-002",
+                    "amount": 15.5,
+                    "type": "expense",
+                    "createdAt": "2025-07-22T10:00:00Z",
+                },
+            ]
+        )
+
+        self.assertEqual(
+            list(
+                Transaction.objects.chronological().values_list(
+                    "transaction_code", "running_balance"
+                )
+            ),
+            [
+                ("API-001", Decimal("40.00")),
+                ("TXN-0001", Decimal("140.00")),
+                ("API-002", Decimal("124.50")),
+            ],
+        )
+        self.assertEqual(Transaction.get_current_balance(), Decimal("124.50"))
+        # bulk_create bypasses save(), the importer counts expenses itself
+        self.assertEqual(
+            DailyExpenseCount.objects.get_count(
+                timezone.localdate(parse_datetime("2025-07-22T10:00:00Z"))
+            ),
+            1,
+        )
+
+    def test_import_transactions_interleaved_batches(self):
+        """Test backdated records spread over batches keep balances exact"""
+        for day in (21, 23, 25):
+            Transaction.objects.create(
+                transaction_code=f"TXN-00{day}",
+                amount=Decimal("100.00"),
+                type="deposit",
+                transaction_date=f"2025-07-{day}T10:00:00Z",
+            )
+
+        TransactionService.import_transactions(
+            [
+                {
+                    "id": f"API-{day}",
+                    "amount": 10 + day,
+                    "type": "expense" if day % 2 else "deposit",
+                    "createdAt": f"2025-07-{day}T12:00:00Z",
+                }
+                for day in (26, 20, 24, 22)
+            ],
+            batch_size=2,
+        )
+
+        self.assertEqual(Transaction.objects.rebuild_running_balances(), 0)
+        self.assertEqual(
+            list(
+                Transaction.objects.chronological().values_list(
+                    "transaction_code", "running_balance"
+                )
+            ),
+            [
+                ("API-20", Decimal("30.00")),
+                ("TXN-0021", Decimal("130.00")),
+                ("API-22", Decimal("162.00")),
+                ("TXN-0023", Decimal("262.00")),
+                ("API-24", Decimal("296.00")),
+                ("TXN-0025", Decimal("396.00")),
+                ("API-26", Decimal("432.00")),
+            ],
+        )
+
+    @patch("apps.transactions.services.TransactionAPIClient")
+    def test_import_transactions_incremental_watermark(self, mock_api_client):
+        """Test repeated imports stop at the previous high-water mark"""
+        mock_client_instance = MagicMock()
+        mock_api_client.return_value = mock_client_instance
+        newest_first = [
+            {
+                "id": f"API-{i:03d}",
+                "amount": 10,
+                "type": "deposit",
+                "createdAt": f"2025-07-20T10:{i:02d}:00Z",
+            }
+            for i in range(5, 0, -1)
+        ]
+        mock_client_instance.iter_transactions.return_value = newest_first[2:]
+
+        TransactionService.import_transactions_from_api()
+
+        state = ImportState.objects.get()
+        self.assertEqual(state.last_transaction_code, "API-003")
+        mock_client_instance.iter_transactions.assert_called_with(order="desc")
+
+        consumed = []
+
+        def stream():
+            for record in newest_first:
+                consumed.append(record["id"])
+                yield record
+
+        mock_client_instance.iter_transactions.return_value = stream()
+        created_count, skipped_count = (
+            TransactionService.import_transactions_from_api()
+        )
+
+        # API-003 shares the watermark and is re-checked, API-002 is older
+        # and ends the stream
+        self.assertEqual(
+            consumed, ["API-005", "API-004", "API-003", "API-002"]
+        )
+        self.assertEqual(created_count, 2)
+        self.assertEqual(skipped_count, 1)
+        state.refresh_from_db()
+        self.assertEqual(state.last_transaction_code, "API-005")
+
+    @patch("apps.transactions.services.TransactionAPIClient")
+    def test_import_transactions_full_resync(self, mock_api_client):
+        """Test a non-incremental import reads the whole upstream set"""
+        ImportState.objects.create(
+            source="transactions-api",
+            last_created_at="2025-07-21T00:00:00Z",
+        )
+        mock_client_instance = MagicMock()
+        mock_api_client.return_value = mock_client_instance
+        mock_client_instance.iter_transactions.return_value = [
+            {
+                "id": "API-001",
+                "amount": 10,
+                "type": "deposit",
+                "createdAt": "2025-07-20T10:00:00Z",
+            }
+        ]
+
+        created_count, _ = TransactionService.import_transactions_from_api(
+            incremental=False
+        )
+
+        self.assertEqual(created_count, 1)
+        mock_client_instance.iter_transactions.assert_called_with()
@@ -1,8 +1,40 @@
-from django.test import TestCase, Client
+import asyncio
+import tempfile
+import warnings
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
 from django.utils import timezone
-from apps.transactions.models import Transaction
+from apps.transactions import cache as ledger_cache
+from apps.transactions.cursors import encode_cursor
+from apps.transactions.views import PAGE_SIZE
+from apps.transactions.models import (
+    IMPORT_JOB_TIMEOUT,
+    BalanceSnapshot,
+    DailyExpenseCount,
+    ImportJob,
+    Transaction,
+)
 from decimal import Decimal
 
+# The worker needs a cache shared with the web processes, a fresh one
+# per run so no ledger version survives from an earlier run
+SHARED_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": tempfile.mkdtemp(prefix="transactions-test-cache-"),
+    }
+}
+
+
+WORKER_API_CLIENT = (
+    "apps.transactions.management.commands.run_import_worker"
+    ".TransactionAPIClient"
+)
+
 
 class TransactionViewTest(TestCase):
 
@@ -33,6 +65,15 @@ class TransactionViewTest(TestCase):
         self.assertContains(response, "TXN-0002")
         self.assertContains(response, "Balance: $70.00")  # 100 - 30
 
+    def test_transaction_list_empty(self):
+        """Test an empty ledger shows the empty state instead of a table"""
+        Transaction.objects.all().delete()
+
+        response = self.client.get("/")
+
+        self.assertContains(response, "No transactions yet")
+        self.assertNotContains(response, "transaction-tbody")
+
     def test_add_transaction_valid_deposit(self):
         """Test adding a valid deposit transaction"""
         response = self.client.post(
@@ -47,6 +88,14 @@ class TransactionViewTest(TestCase):
         self.assertEqual(new_transaction.amount, Decimal("50.00"))
         self.assertEqual(new_transaction.type, "deposit")
 
+        # The new row is prepended out of band instead of reloading
+        self.assertContains(
+            response, 'hx-swap-oob="afterbegin:#transaction-tbody"'
+        )
+        self.assertContains(response, f'id="transaction-{new_transaction.pk}"')
+        self.assertContains(response, "Balance: $120.00")
+        self.assertNotContains(response, "location.reload")
+
     def test_add_transaction_invalid_amount(self):
         """Test adding transaction with invalid amount"""
         response = self.client.post(
@@ -59,6 +108,19 @@ class TransactionViewTest(TestCase):
         # Check no new transaction was created
         self.assertEqual(Transaction.objects.count(), 2)
 
+    def test_add_transaction_daily_limit_on_save(self):
+        """Test the limit holds even when the form pre-check passed"""
+        with patch.object(
+            DailyExpenseCount.objects, "get_count", return_value=0
+        ):
+            DailyExpenseCount.objects.update(count=200)
+            response = self.client.post(
+                "/add-transaction/", {"type": "expense", "amount": "1.00"}
+            )
+
+        self.assertContains(response, "Your daily expense limit reached.")
+        self.assertEqual(Transaction.objects.count(), 2)
+
     def test_load_more_transactions(self):
         """Test load more transactions endpoint"""
         # Create more transactions for pagination
@@ -75,3 +137,328 @@ class TransactionViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         # Should contain some transaction codes
         self.assertContains(response, "TXN-")
+
+    def test_load_more_transactions_cursor(self):
+        """Test cursor pagination walks the ledger without overlaps"""
+        for i in range(15):
+            Transaction.objects.create(
+                transaction_code=f"TXN-{i + 100:04d}",
+                amount=Decimal("10.00"),
+                type="deposit",
+                transaction_date=timezone.now(),
+            )
+
+        response = self.client.get("/")
+        seen = [tx.pk for tx in response.context["transactions"]]
+        cursor = response.context["next_cursor"]
+
+        while cursor:
+            with self.assertNumQueries(1):
+                response = self.client.get(
+                    f"/load-more-transactions/?cursor={cursor}"
+                )
+            self.assertEqual(response.status_code, 200)
+            seen.extend(tx.pk for tx in response.context["transactions"])
+            cursor = response.context["next_cursor"]
+
+        expected = list(
+            Transaction.objects.newest_first().values_list("pk", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_load_more_transactions_cursor_spellings_share_cache(self):
+        """Test equivalent spellings of a cursor read one cache entry"""
+        cursor = encode_cursor(self.deposit)
+        response = self.client.get(
+            "/load-more-transactions/", {"cursor": cursor}
+        )
+
+        for spelling in (f" {cursor}", f"0{cursor}", f"{cursor} "):
+            with self.subTest(spelling), warnings.catch_warnings():
+                warnings.simplefilter("error")
+                with self.assertNumQueries(0):
+                    cached = self.client.get(
+                        "/load-more-transactions/", {"cursor": spelling}
+                    )
+                self.assertEqual(cached.content, response.content)
+
+    def test_load_more_transactions_invalid_cursor(self):
+        """Test malformed cursors are rejected"""
+        for cursor in ("oops", "99999999999999999999_1", "0_" + "9" * 20):
+            response = self.client.get(
+                "/load-more-transactions/", {"cursor": cursor}
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_edit_transaction_swaps_changed_rows(self):
+        """Test an edit re-renders only rows whose balance changed"""
+        response = self.client.post(
+            f"/edit-transaction/{self.deposit.pk}/",
+            {"type": "deposit", "amount": "200.00"},
+        )
+
+        self.assertContains(response, "Transaction updated successfully")
+        self.assertContains(response, "Balance: $170.00")
+        for transaction in (self.deposit, self.expense):
+            self.assertContains(
+                response,
+                f'id="transaction-{transaction.pk}" hx-swap-oob="true"',
+            )
+        self.assertNotContains(response, "location.reload")
+
+        # Rows older than the edited one keep their balances
+        response = self.client.post(
+            f"/edit-transaction/{self.expense.pk}/",
+            {"type": "expense", "amount": "20.00"},
+        )
+        self.assertContains(response, f'id="transaction-{self.expense.pk}"')
+        self.assertNotContains(response, f'id="transaction-{self.deposit.pk}"')
+
+    def test_delete_transaction_swaps_changed_rows(self):
+        """Test a delete removes the row and updates newer balances"""
+        response = self.client.post(f"/delete-transaction/{self.deposit.pk}/")
+
+        self.assertContains(response, "Transaction deleted successfully")
+        self.assertContains(
+            response,
+            f'id="transaction-{self.deposit.pk}" hx-swap-oob="delete"',
+        )
+        self.assertContains(
+            response, f'id="transaction-{self.expense.pk}" hx-swap-oob="true"'
+        )
+        self.assertContains(response, "Balance: $-30.00")
+
+        # Emptying the ledger swaps in the empty state
+        response = self.client.post(f"/delete-transaction/{self.expense.pk}/")
+        self.assertContains(response, 'id="ledger" hx-swap-oob="true"')
+        self.assertContains(response, "No transactions yet")
+
+    def test_edit_deep_in_ledger_swaps_first_page(self):
+        """Test an edit under more than a page of rows swaps one page"""
+        for i in range(PAGE_SIZE):
+            Transaction.objects.create(
+                transaction_code=f"TXN-{i + 100:04d}",
+                amount=Decimal("10.00"),
+                type="deposit",
+                transaction_date=timezone.now(),
+            )
+
+        response = self.client.post(
+            f"/edit-transaction/{self.deposit.pk}/",
+            {"type": "deposit", "amount": "200.00"},
+        )
+
+        self.assertContains(response, 'id="ledger" hx-swap-oob="true"')
+        self.assertContains(response, '<tr id="transaction-', count=PAGE_SIZE)
+        # The edited row is past the first page, so it is not rendered
+        self.assertNotContains(response, f'id="transaction-{self.deposit.pk}"')
+
+        response = self.client.post(f"/delete-transaction/{self.deposit.pk}/")
+        self.assertContains(response, 'id="ledger" hx-swap-oob="true"')
+
+    def test_balance_at(self):
+        """Test the point-in-time balance endpoint"""
+        response = self.client.get("/balance/")
+        self.assertEqual(response.json()["balance"], "70.00")
+
+        before = self.deposit.transaction_date - timedelta(seconds=1)
+        response = self.client.get("/balance/", {"at": before.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), {"at": before.isoformat(), "balance": "0.00"}
+        )
+
+    def test_balance_at_invalid(self):
+        """Test malformed timestamps are rejected"""
+        response = self.client.get("/balance/", {"at": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncReadViewTest(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        for i in range(15):
+            Transaction.objects.create(
+                transaction_code=f"TXN-{i + 1:04d}",
+                amount=Decimal("10.00"),
+                type="deposit",
+                transaction_date=now - timedelta(minutes=15 - i),
+            )
+
+    async def test_read_views_under_asgi(self):
+        """Test the async read views served by the ASGI handler"""
+        response, balance, more = await asyncio.gather(
+            self.async_client.get("/"),
+            self.async_client.get("/balance/"),
+            self.async_client.get("/load-more-transactions/?page=2"),
+        )
+
+        self.assertContains(response, "Balance: $150.00")
+        self.assertContains(response, "TXN-0015")
+        self.assertEqual(balance.json()["balance"], "150.00")
+        self.assertContains(more, "TXN-0005")
+        self.assertNotContains(more, "TXN-0006")
+
+        response = await self.async_client.get(
+            "/load-more-transactions/",
+            {"cursor": response.context["next_cursor"]},
+        )
+        self.assertEqual(
+            [tx.transaction_code for tx in response.context["transactions"]],
+            [f"TXN-{i:04d}" for i in range(5, 0, -1)],
+        )
+
+    async def test_async_helpers_match_sync(self):
+        """Test the async balance lookups agree with the sync ones"""
+        when = timezone.now() - timedelta(minutes=5)
+
+        self.assertEqual(
+            await BalanceSnapshot.objects.abalance_at(when),
+            await sync_to_async(BalanceSnapshot.objects.balance_at)(when),
+        )
+        self.assertEqual(
+            await Transaction.aget_current_balance(), Decimal("150.00")
+        )
+
+    async def test_load_transactions_queues_job(self):
+        """Test the async import trigger queues a single job"""
+        await self.async_client.post("/load-transactions/")
+        await self.async_client.post("/load-transactions/")
+
+        self.assertEqual(await ImportJob.objects.acount(), 1)
+
+
+class ImportJobViewTest(TestCase):
+
+    def test_load_transactions_queues_job(self):
+        """Test the import is queued instead of run inside the request"""
+        response = self.client.post("/load-transactions/")
+
+        self.assertEqual(response.status_code, 200)
+        job = ImportJob.objects.get()
+        self.assertEqual(job.status, ImportJob.STATUS_PENDING)
+        self.assertContains(response, f'hx-get="/import-jobs/{job.pk}/"')
+
+        # A second click reuses the queued job
+        self.client.post("/load-transactions/")
+        self.assertEqual(ImportJob.objects.count(), 1)
+
+    def test_import_job_status_reports_progress(self):
+        """Test the polling endpoint shows live and final counts"""
+        job = ImportJob.objects.create(status=ImportJob.STATUS_RUNNING)
+        ledger_cache.set_import_progress(job.pk, 7, 3)
+
+        response = self.client.get(f"/import-jobs/{job.pk}/")
+        self.assertContains(response, "Created: 7, Skipped: 3")
+        self.assertContains(response, 'hx-trigger="every 2s"')
+
+        job.status = ImportJob.STATUS_SUCCEEDED
+        job.created_count = 10
+        job.skipped_count = 3
+        job.save()
+
+        response = self.client.get(f"/import-jobs/{job.pk}/")
+        self.assertContains(response, "Created: 10, Skipped: 3")
+        self.assertNotContains(response, "hx-trigger")
+        # The ledger and balance are refreshed out of band
+        self.assertContains(response, 'id="ledger" hx-swap-oob="true"')
+        self.assertContains(response, 'id="current-balance" hx-swap-oob')
+
+    def test_import_job_status_does_not_invalidate_ledger(self):
+        """Test polling a finished import leaves the cached ledger alone"""
+        job = ImportJob.objects.create(
+            status=ImportJob.STATUS_SUCCEEDED, created_count=1
+        )
+        version = ledger_cache.get_ledger_version()
+
+        for _ in range(2):
+            response = self.client.get(f"/import-jobs/{job.pk}/")
+
+            self.assertContains(response, "Balance: $")
+        self.assertEqual(ledger_cache.get_ledger_version(), version)
+
+    def test_run_import_worker_requires_shared_cache(self):
+        """Test the worker refuses to run with a process-local cache"""
+        ImportJob.objects.create()
+
+        with self.assertRaisesMessage(CommandError, "shared"):
+            call_command("run_import_worker", once=True, stdout=StringIO())
+
+        self.assertFalse(
+            ImportJob.objects.exclude(status=ImportJob.STATUS_PENDING).exists()
+        )
+
+    @override_settings(CACHES=SHARED_CACHES)
+    @patch(WORKER_API_CLIENT)
+    def test_run_import_worker(self, mock_api_client):
+        """Test the worker command runs pending jobs and records counts"""
+        mock_api_client.return_value.iter_transactions.return_value = [
+            {
+                "id": "API-001",
+                "amount": 12.5,
+                "type": "deposit",
+                "createdAt": "2025-07-20T10:00:00Z",
+            }
+        ]
+        job, second = ImportJob.objects.create(), ImportJob.objects.create()
+
+        call_command("run_import_worker", once=True, stdout=StringIO())
+
+        job.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_SUCCEEDED)
+        self.assertEqual(second.status, ImportJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.created_count, 1)
+        # Both imports went through one client, closed on exit
+        mock_api_client.assert_called_once_with()
+        mock_api_client.return_value.close.assert_called_once_with()
+        self.assertIsNotNone(job.finished_at)
+        self.assertTrue(
+            Transaction.objects.filter(transaction_code="API-001").exists()
+        )
+
+    @override_settings(CACHES=SHARED_CACHES)
+    @patch(WORKER_API_CLIENT)
+    def test_run_import_worker_failure(self, mock_api_client):
+        """Test a failing import marks the job as failed"""
+        mock_api_client.return_value.iter_transactions.side_effect = Exception(
+            "API Error"
+        )
+        job = ImportJob.objects.create()
+
+        call_command(
+            "run_import_worker",
+            once=True,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_FAILED)
+        self.assertEqual(job.error, "API Error")
+
+    def test_claim_next_runs_each_job_once(self):
+        """Test a claimed job is not handed out again"""
+        first = ImportJob.objects.create()
+        second = ImportJob.objects.create()
+
+        self.assertEqual(ImportJob.objects.claim_next(), first)
+        self.assertEqual(ImportJob.objects.claim_next(), second)
+        self.assertIsNone(ImportJob.objects.claim_next())
+
+    def test_stale_running_job_does_not_block_imports(self):
+        """Test a job whose worker died is failed and no longer reused"""
+        started_at = timezone.now() - IMPORT_JOB_TIMEOUT - timedelta(minutes=1)
+        dead = ImportJob.objects.create(
+            status=ImportJob.STATUS_RUNNING, started_at=started_at
+        )
+
+        self.client.post("/load-transactions/")
+        queued = ImportJob.objects.exclude(pk=dead.pk).get()
+        self.assertEqual(queued.status, ImportJob.STATUS_PENDING)
+
+        self.assertEqual(ImportJob.objects.claim_next(), queued)
+        dead.refresh_from_db()
+        self.assertEqual(dead.status, ImportJob.STATUS_FAILED)
+        self.assertIsNotNone(dead.finished_at)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = "transactions"
 
@@ -10,6 +10,12 @@ urlpatterns = [
         views.load_transactions,
         name="load-transactions",
     ),
+    path(
+        "import-jobs/<int:pk>/",
+        views.import_job_status,
+        name="import-job-status",
+    ),
+    path("balance/", views.balance_at, name="balance-at"),
     path("add-transaction/", views.add_transaction, name="add-transaction"),
     path(
         "edit-transaction/<int:pk>/",
@@ -26,4 +32,20 @@ urlpatterns = [
         views.load_more_transactions,
         name="load-more-transactions",
     ),
+    path("api/transactions/", api.transactions, name="api-transactions"),
+    path(
+        "api/transactions/bulk/",
+        api.bulk_create_transactions,
+        name="api-transactions-bulk",
+    ),
+    path(
+        "api/transactions/<int:pk>/",
+        api.transaction_detail,
+        name="api-transaction-detail",
+    ),
+    path(
+        "export/<str:export_format>/",
+        api.export_transactions,
+        name="export-transactions",
+    ),
 ]
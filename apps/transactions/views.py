@@ -1,93 +1,253 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404
-from .models import Transaction
-from django.http import HttpResponse
-from .services import TransactionService
+from django.template.loader import render_to_string
+from .models import (
+    DAILY_EXPENSE_LIMIT,
+    BalanceSnapshot,
+    DailyExpenseLimitReached,
+    ImportJob,
+    Transaction,
+)
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.utils.dateparse import parse_datetime
+from . import cache as ledger_cache
+from .cursors import decode_cursor, encode_cursor, normalize_cursor
 from .forms import TransactionForm
 from django.utils import timezone
+from django.utils.safestring import mark_safe
 from django.core.paginator import Paginator
 
+PAGE_SIZE = 10
+ROWS_TEMPLATE = "transactions/partials/transaction_rows.html"
 
-def _calculate_running_balances(transactions):
-    """Helper function to calculate running balances for transactions"""
-    running_balance = 0
-    transactions_with_balance = []
 
-    for transaction in transactions:
-        if transaction.type == "deposit":
-            running_balance += transaction.amount
-        else:
-            running_balance -= transaction.amount
-        transaction.running_balance = running_balance
-        transactions_with_balance.append(transaction)
+def _get_page_rows(cursor=None):
+    """
+    Helper function to build the query for one page of transactions,
+    newest first, that starts right after the `cursor` position. It reads
+    one extra row to know whether another page exists, which avoids a
+    COUNT query
+    """
+    transactions = Transaction.objects.newest_first()
+    if cursor:
+        transactions = transactions.before(*decode_cursor(cursor))
+    return transactions[: PAGE_SIZE + 1]
 
-    return transactions_with_balance, running_balance
 
+def _split_page(rows):
+    """
+    Helper function to split rows read by _get_page_rows().
+    Returns tuple: (transactions, next_cursor)
+    """
+    page = rows[:PAGE_SIZE]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > PAGE_SIZE else None
+    return page, next_cursor
 
-def _get_paginated_transactions(page_number=1):
-    """Helper function to get paginated transactions with running balances"""
-    transactions = Transaction.objects.all().order_by("transaction_date")
 
-    # Calculate running balance
-    transactions_with_balance, total_balance = _calculate_running_balances(
-        transactions
-    )
+def _get_transactions_page(cursor=None):
+    """
+    Helper function to get one page of transactions, newest first, that
+    starts right after the `cursor` position.
+    Returns tuple: (transactions, next_cursor)
+    """
+    return _split_page(list(_get_page_rows(cursor)))
+
+
+async def _aget_transactions_page(cursor=None):
+    """Async _get_transactions_page(), for async views"""
+    return _split_page([row async for row in _get_page_rows(cursor)])
+
 
-    # Reverse to show newest first
-    transactions_with_balance.reverse()
+def _get_paginated_transactions(page_number=1):
+    """Helper function to get paginated transactions with running balances"""
+    # Running balances are stored on each row, so only the requested page
+    # is read instead of replaying the whole ledger
+    transactions = Transaction.objects.newest_first()
 
     # Paginate
-    paginator = Paginator(transactions_with_balance, 10)
-    page_obj = paginator.get_page(page_number)
+    paginator = Paginator(transactions, PAGE_SIZE)
+    return paginator.get_page(page_number)
 
-    return page_obj, total_balance
 
+def _get_legacy_page(page_number):
+    """
+    Helper function to get a page of the legacy page-number mode.
+    Returns tuple: (transactions, next_cursor)
+    """
+    page_obj = _get_paginated_transactions(page_number)
+    transactions = list(page_obj)
+    next_cursor = (
+        encode_cursor(transactions[-1]) if page_obj.has_next() else None
+    )
+    return transactions, next_cursor
 
-def transaction_list(request):
-    page_number = request.GET.get("page", 1)
-    page_obj, current_balance = _get_paginated_transactions(page_number)
 
-    return render(
-        request,
-        "transactions/index.html",
+def _render_rows(transactions, next_cursor):
+    return render_to_string(
+        ROWS_TEMPLATE,
         {
-            "transactions": page_obj,
-            "current_balance": current_balance,
-            "has_more": page_obj.has_next(),
-            "next_page": (
-                page_obj.next_page_number() if page_obj.has_next() else None
-            ),
+            "transactions": transactions,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
         },
+    ).strip()
+
+
+def _get_fragment_name(cursor=None, page_number=None):
+    """
+    Cache name of a page of rows. Cursors are validated and keyed in
+    their canonical form, so raw query strings never reach the cache.
+    Raises ValueError on a malformed cursor
+    """
+    if page_number is not None:
+        return f"rows:page:{page_number}"
+    return f"rows:cursor:{normalize_cursor(cursor) if cursor else ''}"
+
+
+def _render_transaction_rows(cursor=None, page_number=None):
+    """
+    Helper function to render one page of transaction rows, cached per
+    ledger version so repeat views of an unchanged page skip both the
+    database and the template engine. The page follows `cursor`, or is
+    `page_number` of the legacy page-number mode.
+    Returns an empty string when there are no rows
+    """
+
+    def render_rows():
+        if page_number is not None:
+            return _render_rows(*_get_legacy_page(page_number))
+        return _render_rows(*_get_transactions_page(cursor))
+
+    name = _get_fragment_name(cursor, page_number)
+    return mark_safe(ledger_cache.get_fragment(name, render_rows))
+
+
+async def _arender_transaction_rows(cursor=None, page_number=None):
+    """Async _render_transaction_rows(), for async views"""
+
+    async def render_rows():
+        if page_number is not None:
+            # Paginator counts synchronously, and the legacy mode is only
+            # used by pages rendered before cursors, so it runs in a thread
+            page = await sync_to_async(_get_legacy_page)(page_number)
+            return _render_rows(*page)
+        return _render_rows(*await _aget_transactions_page(cursor))
+
+    name = _get_fragment_name(cursor, page_number)
+    return mark_safe(await ledger_cache.aget_fragment(name, render_rows))
+
+
+def _get_ledger_context():
+    """Helper function to get the first ledger page and the balance"""
+    return {
+        "transaction_rows": _render_transaction_rows(),
+        "current_balance": Transaction.get_current_balance(),
+    }
+
+
+async def _aget_ledger_context():
+    """Async _get_ledger_context(), for async views"""
+    return {
+        "transaction_rows": await _arender_transaction_rows(),
+        "current_balance": await Transaction.aget_current_balance(),
+    }
+
+
+def _render_ledger_update(
+    request, message, modal_id, changed=(), added=None, deleted_pk=None
+):
+    """
+    Helper function to answer a mutation with out-of-band HTMX swaps of
+    the header balance and only the rows whose running balance changed,
+    instead of reloading the page. The whole ledger is swapped for a
+    fresh first page when `changed` is None, or when it was or became
+    empty, as there is no table to update then
+    """
+    context = {
+        "message": message,
+        "modal_id": modal_id,
+        "changed": changed or (),
+        "added": added,
+        "deleted_pk": deleted_pk,
+        "current_balance": Transaction.get_current_balance(),
+    }
+    others = Transaction.objects.all()
+    if added is not None:
+        others = others.exclude(pk=added.pk)
+    if changed is None or not others.exists():
+        context["transaction_rows"] = _render_transaction_rows()
+
+    return render(request, "transactions/partials/ledger_update.html", context)
+
+
+def _get_newer_rows(transaction_date, pk):
+    """
+    Rows displayed above a ledger position, whose balances include it.
+    Returns None when there are more than a page of them, so a mutation
+    deep in the ledger swaps one fresh page instead of every later row
+    """
+    rows = list(
+        Transaction.objects.newest_first().after(transaction_date, pk)[
+            : PAGE_SIZE + 1
+        ]
     )
+    return rows if len(rows) <= PAGE_SIZE else None
 
 
-def load_transactions(request):
+async def transaction_list(request):
+    context = await _aget_ledger_context()
+    return render(request, "transactions/index.html", context)
+
+
+async def load_transactions(request):
     if request.method == "POST":
-        try:
-            created_count, skipped_count = (
-                TransactionService.import_transactions_from_api()
-            )
+        # Queue the import for the worker (manage.py run_import_worker),
+        # reusing a job that is already waiting or running
+        job = await ImportJob.objects.active().afirst()
+        if job is None:
+            job = await ImportJob.objects.acreate()
+
+        return render(
+            request, "transactions/partials/import_status.html", {"job": job}
+        )
 
-            return HttpResponse(
-                f"""
-                <div class="alert alert-success alert-dismissible fade show">
-                    <strong>Success!</strong> Created: {created_count}, Skipped: {skipped_count}
-                    <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                </div>
-                <script>
-                    setTimeout(() => window.location.reload(), 2000);
-                </script>
-                """
-            )
 
-        except Exception as e:
-            return HttpResponse(
-                f"""
-                <div class="alert alert-danger alert-dismissible fade show">
-                    <strong>Error!</strong> {str(e)}
-                    <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                </div>
-                """
+def import_job_status(request, pk):
+    """HTMX polling endpoint reporting the progress of an import job"""
+    job = get_object_or_404(ImportJob, pk=pk)
+
+    context = {"job": job}
+    if job.status == ImportJob.STATUS_RUNNING:
+        progress = ledger_cache.get_import_progress(job.pk)
+        if progress is not None:
+            job.created_count, job.skipped_count = progress
+    elif job.status == ImportJob.STATUS_SUCCEEDED:
+        # Imported rows may land anywhere in the ledger, so swap in a
+        # fresh first page alongside the final status
+        context.update(_get_ledger_context())
+
+    return render(request, "transactions/partials/import_status.html", context)
+
+
+async def balance_at(request):
+    """JSON balance at the ISO 8601 `at` timestamp, now by default"""
+    at = request.GET.get("at")
+    if at is None:
+        when = timezone.now()
+    else:
+        try:
+            when = parse_datetime(at)
+        except ValueError:
+            when = None
+        if when is None:
+            return JsonResponse(
+                {"error": "`at` must be an ISO 8601 datetime"}, status=400
             )
+        if timezone.is_naive(when):
+            when = timezone.make_aware(when)
+
+    balance = await BalanceSnapshot.objects.abalance_at(when)
+    return JsonResponse({"at": when.isoformat(), "balance": f"{balance:.2f}"})
 
 
 def edit_transaction(request, pk):
@@ -96,21 +256,20 @@ def edit_transaction(request, pk):
     if request.method == "POST":
         form = TransactionForm(request.POST, instance=transaction)
         if form.is_valid():
-            form.save()
-
-            # Instead of redirect, return success response for HTMX
-            return HttpResponse(
-                """
-                <div class="alert alert-success">
-                    Transaction updated successfully!
-                </div>
-                <script>
-                    setTimeout(() => {
-                        bootstrap.Modal.getInstance(document.getElementById('editTransactionModal')).hide();
-                        window.location.reload();
-                    }, 1500);
-                </script>
-            """
+            old_date = transaction.transaction_date
+            transaction = form.save()
+
+            # Instead of redirect, update the changed rows over HTMX. A
+            # moved row changes its place and the rows it passed, so the
+            # ledger is swapped instead
+            newer = None
+            if transaction.transaction_date == old_date:
+                newer = _get_newer_rows(transaction.transaction_date, pk)
+            return _render_ledger_update(
+                request,
+                "Transaction updated successfully!",
+                "editTransactionModal",
+                changed=None if newer is None else [transaction, *newer],
             )
         else:
             # Form has errors - re-render the form with errors
@@ -133,21 +292,16 @@ def delete_transaction(request, pk):
 
     if request.method == "POST":
 
+        transaction_date = transaction.transaction_date
         transaction.delete()
 
         # Return success response for HTMX
-        return HttpResponse(
-            """
-            <div class="alert alert-success">
-                Transaction deleted successfully!
-            </div>
-            <script>
-                setTimeout(() => {
-                    bootstrap.Modal.getInstance(document.getElementById('deleteTransactionModal')).hide();
-                    window.location.reload();
-                }, 1500);
-            </script>
-        """
+        return _render_ledger_update(
+            request,
+            "Transaction deleted successfully!",
+            "deleteTransactionModal",
+            changed=_get_newer_rows(transaction_date, pk),
+            deleted_pk=pk,
         )
 
     else:
@@ -158,50 +312,37 @@ def delete_transaction(request, pk):
         )
 
 
-def load_more_transactions(request):
+async def load_more_transactions(request):
     """AJAX endpoint for loading more transactions"""
-    page_number = int(request.GET.get("page", 2))
-    page_obj, _ = _get_paginated_transactions(page_number)
+    cursor = request.GET.get("cursor")
+    if cursor is not None:
+        try:
+            transaction_rows = await _arender_transaction_rows(cursor=cursor)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid cursor")
+    else:
+        # Legacy page-number mode, continued with a cursor from here on
+        page_number = int(request.GET.get("page", 2))
+        transaction_rows = await _arender_transaction_rows(
+            page_number=page_number
+        )
 
-    return render(
-        request,
-        "transactions/partials/transaction_rows.html",
-        {
-            "transactions": page_obj,
-            "has_more": page_obj.has_next(),
-            "next_page": (
-                page_obj.next_page_number() if page_obj.has_next() else None
-            ),
-        },
-    )
+    return HttpResponse(transaction_rows)
 
 
 def _generate_transaction_code():
     """Generate next available transaction code"""
-    count = Transaction.objects.count()
-    return f"TXN-{count + 1:04d}"
+    return Transaction.allocate_codes()[0]
 
 
-def _create_alert_response(message, alert_type="success", auto_close=False):
+def _create_alert_response(message, alert_type="success"):
     """Helper function to create alert responses"""
-    auto_close_script = ""
-    if auto_close:
-        auto_close_script = """
-        <script>
-            setTimeout(() => {
-                bootstrap.Modal.getInstance(document.getElementById('addTransactionModal')).hide();
-                window.location.reload();
-            }, 1500);
-        </script>
-        """
-
     return HttpResponse(
         f"""
         <div class="alert alert-{alert_type} alert-dismissible">
             {message}
             <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
         </div>
-        {auto_close_script}
     """
     )
 
@@ -216,14 +357,23 @@ def add_transaction(request):
                 transaction = form.save(commit=False)
                 transaction.transaction_code = _generate_transaction_code()
                 transaction.transaction_date = timezone.now()
-                transaction.save()
+                # The form only pre-checks the limit, saving enforces it
+                # atomically against concurrent submissions
+                transaction.save(expense_limit=DAILY_EXPENSE_LIMIT)
 
-                return _create_alert_response(
+                return _render_ledger_update(
+                    request,
                     "Transaction added successfully!",
-                    "success",
-                    auto_close=True,
+                    "addTransactionModal",
+                    changed=_get_newer_rows(
+                        transaction.transaction_date, transaction.pk
+                    ),
+                    added=transaction,
                 )
 
+            except DailyExpenseLimitReached as e:
+                return _create_alert_response(str(e), "danger")
+
             except Exception as e:
                 return _create_alert_response(
                     f"Error creating transaction: {str(e)}", "danger"
@@ -36,6 +36,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    "apps.core.middleware.RequestProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -70,6 +72,43 @@ WSGI_APPLICATION = "config.wsgi.application"
 
 DATABASES = {"default": dj_database_url.parse(config("DATABASE_URL"))}
 
+# The ledger index includes running_balance for index-only scans on
+# PostgreSQL. Databases without covering indexes, like SQLite in local
+# development and tests, build it without the column, which is harmless
+SILENCED_SYSTEM_CHECKS = ["models.W040"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="transaction-tracker"),
+    }
+}
+
+# Cache alias used for the ledger balance and other ledger-derived data
+TRANSACTIONS_CACHE_ALIAS = "default"
+
+
+# Request profiling
+# Adds Server-Timing headers and logs slow requests and repeated queries
+
+REQUEST_PROFILING = config("REQUEST_PROFILING", default=False, cast=bool)
+REQUEST_PROFILING_SLOW_MS = config(
+    "REQUEST_PROFILING_SLOW_MS", default=500, cast=int
+)
+REQUEST_PROFILING_MAX_QUERIES = config(
+    "REQUEST_PROFILING_MAX_QUERIES", default=50, cast=int
+)
+REQUEST_PROFILING_DUPLICATE_QUERIES = config(
+    "REQUEST_PROFILING_DUPLICATE_QUERIES", default=5, cast=int
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators